@@ -0,0 +1,497 @@
+"""Benchmarks of the bpy free cores, run from the repository root::
+
+    python benchmarks/bench.py                  # compare with baseline.json
+    python benchmarks/bench.py --update         # record a new baseline
+    python benchmarks/bench.py --max-size 1024 -k trace
+
+Every case runs on synthetic data: alpha images of 256 to 8192 pixels with
+1 to 256 islands (every third one holed, all with wavy outlines), skeletons
+with smoothly moving and holding bones, and meshes with up to six weights
+per vertex. The time of a case is the best of ``--repeat`` runs and its
+peak is what tracemalloc sees during one more run, NumPy reports its
+buffers there too.
+
+A case regresses when its time or peak grows more than ``--threshold`` over
+the baseline, and the script then exits with status 1. Timings only compare
+on the machine that recorded them, so record a baseline before changing
+code rather than trusting the committed one.
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import lru_cache
+from typing import Callable, List, NamedTuple
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bone_dot.core.animation import bone_tracks  # noqa: E402
+from bone_dot.core.atlas import pack_rects  # noqa: E402
+from bone_dot.core.bdsket import (  # noqa: E402
+    CODECS,
+    KIND_ANIMATION,
+    KIND_MESH,
+    BdsketReader,
+    BdsketWriter,
+    write_animation,
+    write_mesh,
+    write_skeleton,
+)
+from bone_dot.core.buffers import compile_mesh  # noqa: E402
+from bone_dot.core.contour import alpha_mask, trace_contours  # noqa: E402
+from bone_dot.core.cutoff import lod_meshes  # noqa: E402
+from bone_dot.core.mesh import world_positions  # noqa: E402
+from bone_dot.core.simplify import simplify_contours, stride_sample  # noqa: E402
+from bone_dot.core.triangulate import triangulate_contours  # noqa: E402
+from bone_dot.core.weights import group_bone_map, pack_weights  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+IMAGE_SIZES = (256, 1024, 4096, 8192)
+ISLANDS = (1, 16, 256)
+SKELETONS = ((16, 120), (64, 240))
+MESH_VERTICES = (10_000, 250_000)
+FPS = 24
+
+TMP_DIR = tempfile.mkdtemp(prefix="bonedot-bench-")
+
+
+class Case(NamedTuple):
+    name: str
+    # builds the arguments outside the measured runs
+    setup: Callable[[], tuple]
+    run: Callable
+
+
+# synthetic data, cached so the cases of one image share it
+
+
+@lru_cache(maxsize=1)
+def synthetic_alpha(size: int, islands: int) -> np.ndarray:
+    """Square alpha image holding ``islands`` blobs on a grid."""
+    rng = np.random.default_rng(size * 1000 + islands)
+    alpha = np.zeros((size, size), dtype=np.uint8)
+    per_row = math.ceil(math.sqrt(islands))
+    cell = size // per_row
+    for i in range(islands):
+        row, col = divmod(i, per_row)
+        y, x = np.ogrid[-cell / 2 : cell / 2, -cell / 2 : cell / 2]
+        radius = np.hypot(x, y) / (cell / 2)
+        angle = np.arctan2(y, x)
+        lobes = rng.integers(3, 9)
+        outline = 0.8 + 0.12 * np.sin(lobes * angle + rng.uniform(0, math.tau))
+        blob = radius < outline
+        if i % 3 == 2:
+            blob &= radius > 0.3
+        block = alpha[row * cell : (row + 1) * cell, col * cell : (col + 1) * cell]
+        block[blob[: block.shape[0], : block.shape[1]]] = 255
+    return alpha
+
+
+@lru_cache(maxsize=1)
+def alpha_file(size: int, islands: int) -> str:
+    path = os.path.join(TMP_DIR, f"alpha_{size}_{islands}.png")
+    alpha = synthetic_alpha(size, islands)
+    Image.fromarray(np.dstack((alpha, alpha)), "LA").save(path, compress_level=1)
+    return path
+
+
+@lru_cache(maxsize=1)
+def mask(size: int, islands: int) -> np.ndarray:
+    return synthetic_alpha(size, islands) >= 1
+
+
+@lru_cache(maxsize=2)
+def traced(size: int, islands: int, corners_only: bool) -> list:
+    return [c.points for c in trace_contours(mask(size, islands), corners_only)]
+
+
+@lru_cache(maxsize=1)
+def simplified(size: int, islands: int) -> list:
+    return simplify_contours(traced(size, islands, True), 1.0)
+
+
+@lru_cache(maxsize=1)
+def pose_matrices(bones: int, frames: int) -> np.ndarray:
+    """Pose samples of bones that swing, drift and hold still in turns."""
+    rng = np.random.default_rng(bones * 1000 + frames)
+    t = np.arange(frames, dtype=np.float64)[:, None]
+    speed = rng.uniform(0.02, 0.2, bones)
+    phase = rng.uniform(0, math.tau, bones)
+    angles = np.sin(t * speed + phase) * rng.uniform(0.1, 2.0, bones)
+    locations = np.cumsum(rng.normal(0, 0.01, (frames, bones, 2)), axis=0)
+    # a third of the bones only move in the first half, then hold
+    hold = np.arange(bones) % 3 == 0
+    angles[frames // 2 :, hold] = angles[frames // 2, hold]
+    locations[frames // 2 :, hold] = locations[frames // 2, hold]
+
+    matrices = np.zeros((frames, bones, 4, 4))
+    matrices[..., 0, 0] = matrices[..., 1, 1] = np.cos(angles)
+    matrices[..., 1, 0] = np.sin(angles)
+    matrices[..., 0, 1] = -np.sin(angles)
+    matrices[..., 2, 2] = matrices[..., 3, 3] = 1.0
+    matrices[..., :2, 3] = locations
+    return matrices
+
+
+def bone_names(count: int) -> List[str]:
+    return [f"bone_{i}" for i in range(count)]
+
+
+@lru_cache(maxsize=1)
+def synthetic_mesh(vertex_count: int, bones: int = 64) -> dict:
+    """Grid mesh with 1 to 6 weights per vertex, some on a group that is no bone."""
+    rng = np.random.default_rng(vertex_count)
+    side = math.isqrt(vertex_count)
+    x, y = np.meshgrid(np.arange(side), np.arange(side))
+    co = np.column_stack((x.ravel(), np.zeros(side * side), y.ravel()))
+    quads = (np.arange(side - 1)[None, :] + np.arange(side - 1)[:, None] * side).ravel()
+    triangles = np.concatenate(
+        (
+            np.column_stack((quads, quads + 1, quads + side)),
+            np.column_stack((quads + 1, quads + side + 1, quads + side)),
+        )
+    )
+    loop_vertices = triangles.ravel()
+    loop_uvs = co[loop_vertices][:, [0, 2]] / side
+    # the left half of the grid as a separate UV island, split along x = side / 2
+    seam_uvs = loop_uvs.copy()
+    left = np.repeat(co[triangles[:, 0], 0] < side // 2, 3)
+    seam_uvs[left, 0] += 1.0
+    names = bone_names(bones)
+    groups = ["bonedot_base_sprite"] + names
+    counts = rng.integers(1, 7, len(co))
+    weights = np.column_stack(
+        (
+            np.repeat(np.arange(len(co)), counts),
+            rng.integers(0, len(groups), counts.sum()),
+            rng.random(counts.sum()),
+        )
+    )
+    group_bones = group_bone_map(groups, names)
+    skin = pack_weights(len(co), weights, group_bones, bones)
+    vertex_arrays = {
+        "vertices": co[:, [0, 2]],
+        "bone_indices": skin["indices"],
+        "bone_weights": skin["weights"],
+    }
+    # the buffers the exporter writes
+    buffers, triangles = compile_mesh(
+        triangles, np.arange(len(co)), vertex_arrays, {"uvs": loop_uvs}
+    )
+    return {
+        "co": co,
+        "loop_vertices": loop_vertices,
+        "loop_uvs": loop_uvs,
+        "seam_uvs": seam_uvs,
+        "weights": weights,
+        "group_bones": group_bones,
+        "vertex_arrays": vertex_arrays,
+        "mesh": {
+            "name": "mesh",
+            "texture": "sprite.png",
+            "z_hint": 0,
+            "triangles": triangles,
+            **buffers,
+        },
+        "bones": names,
+    }
+
+
+def skeleton(bones: int) -> List[dict]:
+    names = bone_names(bones)
+    return [
+        {
+            "name": name,
+            "parent": names[i - 1] if i else None,
+            "head": [0.0, float(i)],
+            "tail": [0.0, float(i + 1)],
+            "angle": 0.0,
+        }
+        for i, name in enumerate(names)
+    ]
+
+
+def export_sections(codec: str):
+    """Arguments for writing a skeleton, meshes and actions to a file."""
+    bones, frames = 64, 240
+    tracks = bone_tracks(
+        list(range(frames)), bone_names(bones), pose_matrices(bones, frames)
+    )
+    mesh = synthetic_mesh(10_000)
+    path = os.path.join(TMP_DIR, f"export_{codec}.bdsket")
+    return path, CODECS[codec], skeleton(bones), mesh, tracks
+
+
+def write_export(path, codec, bones, mesh, tracks):
+    with open(path, "wb") as f, BdsketWriter(f, codec) as writer:
+        write_skeleton(writer, "skeleton", bones)
+        for i in range(4):
+            write_mesh(writer, f"mesh_{i}", mesh["mesh"])
+        data = {"fps": FPS, "interpolation": "linear", "tracks": tracks}
+        for i in range(8):
+            animation = {"name": f"action_{i}", "data": data}
+            write_animation(writer, f"action_{i}", animation)
+
+
+def read_export(path):
+    with BdsketReader(path) as reader:
+        for kind in (KIND_MESH, KIND_ANIMATION):
+            for name in reader.names(kind):
+                reader.read(kind, name)
+
+
+def written_export(codec: str):
+    args = export_sections(codec)
+    write_export(*args)
+    return (args[0],)
+
+
+# cases
+
+
+def decode(path):
+    with Image.open(path) as pil_img:
+        return alpha_mask(pil_img)
+
+
+def stride(contours, rate):
+    return [stride_sample(points, rate) for points in contours]
+
+
+def image_cases(size: int, islands: int) -> List[Case]:
+    key = f"{size}/{islands}"
+    return [
+        Case(f"decode/{key}", lambda: (alpha_file(size, islands),), decode),
+        Case(f"trace/{key}", lambda: (mask(size, islands),), trace_contours),
+        Case(
+            f"trace_corners/{key}",
+            lambda: (mask(size, islands), True),
+            trace_contours,
+        ),
+        Case(f"stride/{key}", lambda: (traced(size, islands, False), 16), stride),
+        Case(
+            f"simplify/{key}",
+            lambda: (traced(size, islands, True), 1.0),
+            simplify_contours,
+        ),
+        Case(
+            f"triangulate/{key}",
+            lambda: (simplified(size, islands),),
+            triangulate_contours,
+        ),
+        Case(
+            f"lods/{key}",
+            lambda: (traced(size, islands, True), 3, 2.0),
+            lod_meshes,
+        ),
+    ]
+
+
+def track_cases(bones: int, frames: int) -> List[Case]:
+    return [
+        Case(
+            f"tracks/{reduction.lower()}/{bones}x{frames}",
+            lambda reduction=reduction: (
+                list(range(frames)),
+                bone_names(bones),
+                pose_matrices(bones, frames),
+                1e-5,
+                reduction,
+            ),
+            bone_tracks,
+        )
+        for reduction in ("EXACT", "LINEAR", "CUBIC")
+    ]
+
+
+def mesh_cases(vertex_count: int) -> List[Case]:
+    def weights_setup():
+        mesh = synthetic_mesh(vertex_count)
+        return vertex_count, mesh["weights"], mesh["group_bones"], len(mesh["bones"])
+
+    def compile_setup():
+        mesh = synthetic_mesh(vertex_count)
+        loop_vertices = mesh["loop_vertices"]
+        triangle_loops = np.arange(len(loop_vertices)).reshape(-1, 3)
+        return (
+            triangle_loops,
+            loop_vertices,
+            mesh["vertex_arrays"],
+            {"uvs": mesh["seam_uvs"]},
+        )
+
+    def write_setup():
+        return BdsketWriter(io.BytesIO()), "mesh", synthetic_mesh(vertex_count)["mesh"]
+
+    matrix = np.array(
+        [[0.0, -1.0, 0.0, 1.0], [1.0, 0.0, 0.0, 2.0], [0.0, 0.0, 1.0, 3.0], [0] * 4]
+    )
+    return [
+        Case(
+            f"world_positions/{vertex_count}",
+            lambda: (synthetic_mesh(vertex_count)["co"], matrix),
+            world_positions,
+        ),
+        Case(f"weights/{vertex_count}", weights_setup, pack_weights),
+        Case(f"compile_mesh/{vertex_count}", compile_setup, compile_mesh),
+        Case(f"write_mesh/{vertex_count}", write_setup, write_mesh),
+    ]
+
+
+def all_cases(max_size: int) -> List[Case]:
+    cases = []
+    for size in IMAGE_SIZES:
+        if size <= max_size:
+            for islands in ISLANDS:
+                cases += image_cases(size, islands)
+    for bones, frames in SKELETONS:
+        cases += track_cases(bones, frames)
+    for vertex_count in MESH_VERTICES:
+        cases += mesh_cases(vertex_count)
+    for codec in CODECS:
+        cases.append(
+            Case(
+                f"bdsket_write/{codec.lower()}",
+                lambda c=codec: export_sections(c),
+                write_export,
+            )
+        )
+        cases.append(
+            Case(
+                f"bdsket_read/{codec.lower()}",
+                lambda c=codec: written_export(c),
+                read_export,
+            )
+        )
+    sizes = np.random.default_rng(0).integers(8, 256, (500, 2)).tolist()
+    cases.append(Case("atlas_pack/500", lambda: (sizes, 4096, 2), pack_rects))
+    return cases
+
+
+# measuring
+
+
+def measure(case: Case, repeat: int) -> dict:
+    args = case.setup()
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case.run(*args)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        case.run(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"time": best, "peak": peak}
+
+
+def compare(result: dict, base: dict, threshold: float, min_time: float):
+    """Names of the measures of ``result`` that regressed against ``base``."""
+    regressed = []
+    if result["time"] > max(base["time"] * (1 + threshold), base["time"] + min_time):
+        regressed.append("time")
+    # small allocations move with the interpreter rather than the code
+    if result["peak"] > max(base["peak"] * (1 + threshold), base["peak"] + 65536):
+        regressed.append("peak")
+    return regressed
+
+
+def change(value, base) -> str:
+    if base is None:
+        return "new"
+    return f"{(value / base - 1) * 100:+.0f}%" if base else "-"
+
+
+def load_baseline(path) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["cases"]
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, results: dict):
+    cases = load_baseline(path)
+    cases.update(results)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "cases": cases}, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument(
+        "--update", action="store_true", help="store the results as the baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.3,
+        help="allowed growth over the baseline, 0.3 is 30%%",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.002,
+        help="seconds a case may always slow down by, against timer noise",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-size", type=int, default=max(IMAGE_SIZES))
+    parser.add_argument(
+        "-k", dest="select", default="", help="only run cases containing this"
+    )
+    args = parser.parse_args(argv)
+    try:
+        return run(args)
+    finally:
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+def run(args) -> int:
+    baseline = {} if args.update else load_baseline(args.baseline)
+    results = {}
+    failures = []
+    print(f"{'case':<32} {'time ms':>10} {'':>6} {'peak MB':>10} {'':>6}")
+    for case in all_cases(args.max_size):
+        if args.select not in case.name:
+            continue
+        result = measure(case, args.repeat)
+        results[case.name] = result
+        base = baseline.get(case.name)
+        regressed = compare(result, base, args.threshold, args.min_time) if base else []
+        if regressed:
+            failures.append((case.name, regressed))
+        print(
+            f"{case.name:<32} {result['time'] * 1000:>10.2f} "
+            f"{change(result['time'], base and base['time']):>6} "
+            f"{result['peak'] / 2**20:>10.2f} "
+            f"{change(result['peak'], base and base['peak']):>6}"
+            + ("  REGRESSED" if regressed else ""),
+            flush=True,
+        )
+
+    if args.update:
+        save_baseline(args.baseline, results)
+        print(f"baseline written to {args.baseline}")
+        return 0
+    for name, regressed in failures:
+        print(f"regression: {name} ({', '.join(regressed)})", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
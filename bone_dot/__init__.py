@@ -1,11 +1,8 @@
-import bpy
-import sys
-import os
-import subprocess
-
-from bpy.props import BoolProperty
-
-from bone_dot.panel.uv_panel import Bonedot_PT_UVTools
+try:
+    import bpy
+except ImportError:
+    # bone_dot.core also runs in worker processes outside of Blender
+    bpy = None
 
 bl_info = {
     "name": "BoneDot",
@@ -20,26 +17,16 @@ bl_info = {
 }
 
 
-def install_wheels():
-    addon_dir = os.path.dirname(__file__)
-    libs_dir = os.path.join(addon_dir, "lib")
-    wheels = [
-        os.path.join(libs_dir, f) for f in os.listdir(libs_dir) if f.endswith(".whl")
-    ]
-    subprocess.check_call([sys.executable, "-m", "ensurepip"])
-    for wheel_path in wheels:
-        subprocess.check_call(
-            [sys.executable, "-m", "pip", "install", "--upgrade", wheel_path]
-        )
-
-
 def get_classes():
-    from bone_dot.panel import viewport_panel, sprite_panel, uv_panel
+    from bone_dot.panel import viewport_panel, sprite_panel, uv_panel, profile_panel
     from bone_dot.operator import (
         view2d_operator,
         sprite_operator,
         mesh_operator,
         uv_operator,
+        export_operator,
+        atlas_operator,
+        profile_operator,
     )
 
     classes = (
@@ -51,22 +38,47 @@ def get_classes():
         sprite_operator.Bonedot_OT_ImportSprites,
         sprite_operator.Bonedot_OT_CreateMaterialGroup,
         sprite_operator.Bonedot_OT_ImportSingleSprite,
+        sprite_operator.Bonedot_OT_ImportSpriteSheet,
         mesh_operator.Bonedot_OT_CutoffMesh,
         mesh_operator.Bonedot_OT_TrisToQuads,
+        mesh_operator.Bonedot_OT_ClearContourCache,
         uv_operator.Bonedot_OT_ModalUVSyncOperator,
+        export_operator.Bonedot_OT_ExportAnimation,
+        atlas_operator.Bonedot_OT_BuildAtlas,
+        # profiling
+        profile_panel.Bonedot_PT_Profile,
+        profile_operator.Bonedot_OT_ToggleProfiling,
+        profile_operator.Bonedot_OT_ClearProfile,
+        profile_operator.Bonedot_OT_WriteTrace,
     )
     return classes
 
 
+def redraw_when_installed():
+    from bone_dot.dependencies import INSTALLING, installer
+
+    if installer.state == INSTALLING:
+        return 1.0
+    # let the panels drop their pending note and enable the operators
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            area.tag_redraw()
+    return None
+
+
 def register():
-    try:
-        import PIL
-        import numpy
-    except ImportError:
-        install_wheels()
+    from bone_dot.dependencies import INSTALLING, installer
+    from bone_dot.operator import image_index
+
+    # cheap when the modules are there, a background install when not
+    installer.check()
+    if installer.state == INSTALLING:
+        bpy.app.timers.register(redraw_when_installed, first_interval=1.0)
+
     classes = get_classes()
     for cls in classes:
         bpy.utils.register_class(cls)
+    image_index.register_handlers()
     bpy.types.Scene.bonedot_scale = bpy.props.FloatProperty(
         name="Scale",
         description="Sprites scale when exporting and Importing",
@@ -77,6 +89,11 @@ def register():
 
 
 def unregister():
+    from bone_dot.operator import image_index
+
+    image_index.unregister_handlers()
+    if bpy.app.timers.is_registered(redraw_when_installed):
+        bpy.app.timers.unregister(redraw_when_installed)
     classes = get_classes()
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
@@ -0,0 +1,153 @@
+from math import isclose
+from typing import List
+
+import numpy as np
+
+
+def matrices_to_2d(matrices: np.ndarray):
+    """Split (frames, bones, 4, 4) pose matrices into 2D locations and angles."""
+    locations = matrices[..., :2, 3]
+    # z of an XYZ euler, unaffected by scale on the matrix columns
+    angles = np.arctan2(matrices[..., 1, 0], matrices[..., 0, 0])
+    return locations, angles
+
+
+def drop_repeated_keys(
+    frames: List[int], locations: np.ndarray, angles: np.ndarray, epsilon=1e-5
+):
+    """Keep a key only when it moved away from the last kept one."""
+    loc_track = []
+    rot_track = []
+    prev_loc = None
+    prev_rot = None
+    for frame, (x, y), ang in zip(frames, locations.tolist(), angles.tolist()):
+        loc2d = [round(x, 6), round(y, 6)]
+        ang = round(ang, 6)
+        if (
+            prev_loc is None
+            or not isclose(prev_loc[0], loc2d[0], abs_tol=epsilon)
+            or not isclose(prev_loc[1], loc2d[1], abs_tol=epsilon)
+        ):
+            loc_track.append([frame, loc2d[0], loc2d[1]])
+            prev_loc = loc2d
+
+        if prev_rot is None or not isclose(prev_rot, ang, abs_tol=epsilon):
+            rot_track.append([frame, ang])
+            prev_rot = ang
+    return loc_track, rot_track
+
+
+def hermite_tangents(key_frames: np.ndarray, key_values: np.ndarray):
+    """Catmull-Rom tangents for unevenly spaced keys, one sided at the ends."""
+    tangents = np.zeros_like(key_values)
+    if len(key_frames) < 2:
+        return tangents
+    span = (key_frames[2:] - key_frames[:-2])[:, None]
+    tangents[1:-1] = (key_values[2:] - key_values[:-2]) / span
+    tangents[0] = (key_values[1] - key_values[0]) / (key_frames[1] - key_frames[0])
+    tangents[-1] = (key_values[-1] - key_values[-2]) / (key_frames[-1] - key_frames[-2])
+    return tangents
+
+
+def interpolate_keys(key_frames, key_values, frames, cubic=False) -> np.ndarray:
+    """Evaluate (keys, dims) values at ``frames`` the way the player would."""
+    key_frames = np.asarray(key_frames, dtype=np.float64)
+    frames = np.asarray(frames, dtype=np.float64)
+    if len(key_frames) == 1:
+        return np.repeat(key_values[:1], len(frames), axis=0)
+
+    seg = np.searchsorted(key_frames, frames, side="right") - 1
+    seg = np.clip(seg, 0, len(key_frames) - 2)
+    t0 = key_frames[seg]
+    dt = key_frames[seg + 1] - t0
+    t = ((frames - t0) / dt)[:, None]
+    p0 = key_values[seg]
+    p1 = key_values[seg + 1]
+    if not cubic:
+        return p0 + (p1 - p0) * t
+
+    tangents = hermite_tangents(key_frames, key_values)
+    m0 = tangents[seg] * dt[:, None]
+    m1 = tangents[seg + 1] * dt[:, None]
+    t2 = t * t
+    t3 = t2 * t
+    return (
+        (2 * t3 - 3 * t2 + 1) * p0
+        + (t3 - 2 * t2 + t) * m0
+        + (-2 * t3 + 3 * t2) * p1
+        + (t3 - t2) * m1
+    )
+
+
+def reduce_keys(frames, values, tolerance, cubic=False) -> np.ndarray:
+    """Keep-mask of the keys needed to stay within ``tolerance`` of ``values``.
+
+    Starts from the end keys and keeps inserting the worst reproduced frame
+    until interpolating the kept keys matches every sample. ``values`` is
+    (frames, dims); the error is the euclidean distance per frame.
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(len(frames), -1)
+    frames = np.asarray(frames, dtype=np.float64)
+    keep = np.zeros(len(frames), dtype=bool)
+    if not len(frames):
+        return keep
+    keep[0] = True
+    # a track that never leaves its first value needs a single key
+    if np.all(np.linalg.norm(values - values[0], axis=1) <= tolerance):
+        return keep
+    keep[-1] = True
+    while True:
+        fitted = interpolate_keys(frames[keep], values[keep], frames, cubic)
+        error = np.linalg.norm(fitted - values, axis=1)
+        error[keep] = 0.0
+        worst = int(np.argmax(error))
+        if error[worst] <= tolerance:
+            return keep
+        keep[worst] = True
+
+
+def bone_tracks(
+    frames: List[int],
+    bone_names: List[str],
+    matrices: np.ndarray,
+    epsilon=1e-5,
+    reduction="EXACT",
+    location_tolerance=1e-4,
+    rotation_tolerance=1e-3,
+):
+    """Build per bone location/rotation tracks from frame-major samples.
+
+    ``matrices`` holds one (bones, 4, 4) block of armature space pose
+    matrices per sampled frame, in the order of ``bone_names``.
+    ``reduction`` is ``EXACT`` to only drop repeated keys, or ``LINEAR`` /
+    ``CUBIC`` to drop every key that interpolation reproduces within the
+    tolerances. Reduced rotation tracks are unwrapped, so they never spin
+    the long way round between two keys.
+    """
+    locations, angles = matrices_to_2d(np.asarray(matrices, dtype=np.float64))
+    tracks = []
+    for b, name in enumerate(bone_names):
+        if reduction == "EXACT":
+            loc_track, rot_track = drop_repeated_keys(
+                frames, locations[:, b], angles[:, b], epsilon
+            )
+        else:
+            cubic = reduction == "CUBIC"
+            loc = locations[:, b]
+            rot = np.unwrap(angles[:, b])
+            loc_keep = reduce_keys(frames, loc, location_tolerance, cubic)
+            rot_keep = reduce_keys(frames, rot, rotation_tolerance, cubic)
+            loc_track = [
+                [frame, round(x, 6), round(y, 6)]
+                for frame, (x, y) in zip(
+                    np.asarray(frames)[loc_keep].tolist(), loc[loc_keep].tolist()
+                )
+            ]
+            rot_track = [
+                [frame, round(ang, 6)]
+                for frame, ang in zip(
+                    np.asarray(frames)[rot_keep].tolist(), rot[rot_keep].tolist()
+                )
+            ]
+        tracks.append({"bone": name, "location": loc_track, "rotation": rot_track})
+    return tracks
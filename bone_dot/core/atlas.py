@@ -0,0 +1,176 @@
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+
+class Placement(NamedTuple):
+    page: int
+    x: int
+    y: int
+
+
+def next_power_of_two(value: int) -> int:
+    return 1 << max(int(value) - 1, 0).bit_length()
+
+
+def uv_bbox(uvs: np.ndarray, size):
+    """Pixel box ``(x0, y0, x1, y1)`` the UVs reach into, clamped to the image."""
+    w, h = size
+    if not len(uvs):
+        return None
+    px = uvs[:, 0] * w
+    py = (1 - uvs[:, 1]) * h
+    x0 = int(np.clip(np.floor(px.min()), 0, w))
+    x1 = int(np.clip(np.ceil(px.max()), 0, w))
+    y0 = int(np.clip(np.floor(py.min()), 0, h))
+    y1 = int(np.clip(np.ceil(py.max()), 0, h))
+    return x0, y0, x1, y1
+
+
+def union_bbox(*boxes):
+    boxes = [box for box in boxes if box is not None]
+    if not boxes:
+        return None
+    boxes = np.asarray(boxes)
+    return (*boxes[:, :2].min(axis=0).tolist(), *boxes[:, 2:].max(axis=0).tolist())
+
+
+class MaxRects:
+    """MaxRects bin with best short side fit, free rects kept as (k, 4) x, y, w, h."""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.free = np.array([[0, 0, width, height]], dtype=np.int64)
+
+    def insert(self, w: int, h: int) -> Optional[tuple]:
+        free = self.free
+        fits = (free[:, 2] >= w) & (free[:, 3] >= h)
+        if not fits.any():
+            return None
+        candidates = np.flatnonzero(fits)
+        left_w = free[candidates, 2] - w
+        left_h = free[candidates, 3] - h
+        short = np.minimum(left_w, left_h)
+        long = np.maximum(left_w, left_h)
+        best = candidates[np.lexsort((long, short))[0]]
+        x, y = free[best, :2].tolist()
+        self.place(x, y, w, h)
+        return x, y
+
+    def place(self, x, y, w, h):
+        free = self.free
+        hit = (
+            (free[:, 0] < x + w)
+            & (free[:, 0] + free[:, 2] > x)
+            & (free[:, 1] < y + h)
+            & (free[:, 1] + free[:, 3] > y)
+        )
+        split = free[hit]
+        fx, fy, fw, fh = split.T
+        pieces = [
+            free[~hit],
+            np.column_stack((fx, fy, x - fx, fh)),
+            np.column_stack((np.full_like(fx, x + w), fy, fx + fw - (x + w), fh)),
+            np.column_stack((fx, fy, fw, y - fy)),
+            np.column_stack((fx, np.full_like(fy, y + h), fw, fy + fh - (y + h))),
+        ]
+        free = np.concatenate(pieces)
+        free = free[(free[:, 2] > 0) & (free[:, 3] > 0)]
+        self.free = self.prune(free)
+
+    @staticmethod
+    def prune(free: np.ndarray) -> np.ndarray:
+        """Drop free rects that lie inside another one."""
+        x0, y0 = free[:, 0], free[:, 1]
+        x1, y1 = x0 + free[:, 2], y0 + free[:, 3]
+        inside = (
+            (x0[:, None] >= x0[None, :])
+            & (y0[:, None] >= y0[None, :])
+            & (x1[:, None] <= x1[None, :])
+            & (y1[:, None] <= y1[None, :])
+        )
+        np.fill_diagonal(inside, False)
+        # of two equal rects only the later one is dropped
+        equal = inside & inside.T
+        inside &= ~equal | np.tri(len(free), k=-1, dtype=bool)
+        return free[~inside.any(axis=1)]
+
+
+def pack_rects(sizes, max_size=4096, padding=2):
+    """Pack (w, h) sizes into as few ``max_size`` square pages as needed.
+
+    Returns one :class:`Placement` per size and the power of two size of
+    every page. Each rect keeps ``padding`` empty pixels to its right and
+    bottom so neighbours never bleed into each other when filtered.
+    """
+    sizes = np.asarray(sizes, dtype=np.int64).reshape(-1, 2)
+    if np.any(sizes > max_size):
+        raise ValueError(f"a sprite is larger than the {max_size}px atlas")
+    # big rects first pack tighter
+    order = np.lexsort((sizes.min(axis=1), sizes.max(axis=1)))[::-1]
+    bins: List[MaxRects] = []
+    placements = [None] * len(sizes)
+    for i in order.tolist():
+        w, h = sizes[i].tolist()
+        for page, bin_ in enumerate(bins):
+            spot = bin_.insert(w + padding, h + padding)
+            if spot is not None:
+                break
+        else:
+            bins.append(MaxRects(max_size + padding, max_size + padding))
+            page = len(bins) - 1
+            spot = bins[page].insert(w + padding, h + padding)
+        placements[i] = Placement(page, *spot)
+
+    page_sizes = [[1, 1] for _ in bins]
+    for (w, h), placement in zip(sizes.tolist(), placements):
+        extent = page_sizes[placement.page]
+        extent[0] = max(extent[0], placement.x + w)
+        extent[1] = max(extent[1], placement.y + h)
+    page_sizes = [tuple(next_power_of_two(v) for v in size) for size in page_sizes]
+    return placements, page_sizes
+
+
+def compose_pages(images, regions, placements, page_sizes) -> List[np.ndarray]:
+    """Copy each RGBA ``region`` of ``images`` to its place on the pages."""
+    pages = [np.zeros((h, w, 4), dtype=np.uint8) for w, h in page_sizes]
+    for image, (x0, y0, x1, y1), placement in zip(images, regions, placements):
+        page = pages[placement.page]
+        page[
+            placement.y : placement.y + y1 - y0, placement.x : placement.x + x1 - x0
+        ] = image[y0:y1, x0:x1]
+    return pages
+
+
+def remap_uvs(uvs: np.ndarray, size, region, placement: Placement, page_size):
+    """Move UVs of a ``size`` image onto its ``region`` copy in the atlas."""
+    w, h = size
+    pw, ph = page_size
+    px = uvs[:, 0] * w - region[0] + placement.x
+    py = (1 - uvs[:, 1]) * h - region[1] + placement.y
+    return np.column_stack((px / pw, 1 - py / ph)).astype(uvs.dtype)
+
+
+def unmap_uvs(uvs: np.ndarray, size, region, placement: Placement, page_size):
+    """Move UVs on an atlas page back onto the ``size`` image, undoing remap_uvs."""
+    w, h = size
+    pw, ph = page_size
+    px = uvs[:, 0] * pw - placement.x + region[0]
+    py = (1 - uvs[:, 1]) * ph - placement.y + region[1]
+    return np.column_stack((px / w, 1 - py / h)).astype(uvs.dtype)
+
+
+def atlas_placement(obj):
+    """Source size, copied region and page placement of a sprite in an atlas.
+
+    Build Atlas keeps them on the objects it packs, ``None`` for the rest.
+    """
+    if "bonedot_atlas_region" not in obj:
+        return None
+    x, y = obj["bonedot_atlas_offset"]
+    return (
+        tuple(obj["bonedot_source_size"]),
+        tuple(obj["bonedot_atlas_region"]),
+        Placement(0, x, y),
+    )
@@ -0,0 +1,351 @@
+"""Reader and writer for the binary .bdsket container.
+
+Layout, all little endian::
+
+    header   magic "BDSK", u16 version, u16 flags, u32 section count,
+             u32 reserved, u64 offset of the section table
+    payloads one per section, each aligned to 16 bytes
+    table    per section: u16 kind, u16 codec, u32 name length, u64 offset,
+             u64 stored size, u64 raw size, then the UTF-8 name
+
+The table sits at the end so sections can be written as soon as they are
+extracted. A section payload is a u32 length, a JSON description of its
+scalars and arrays, then the arrays themselves, each aligned to 16 bytes,
+so a mapped file hands out arrays without copying. A section may be stored
+zlib or lzma compressed instead, its arrays are then copied out on read.
+"""
+
+import json
+import lzma
+import mmap
+import struct
+import zlib
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+
+MAGIC = b"BDSK"
+VERSION = 1
+ALIGN = 16
+
+HEADER = struct.Struct("<4sHHIIQ")
+ENTRY = struct.Struct("<HHIQQQ")
+META_LEN = struct.Struct("<I")
+
+KIND_TEXTURE = 1
+KIND_MESH = 2
+KIND_SKELETON = 3
+KIND_ANIMATION = 4
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+
+CODECS = {"NONE": CODEC_RAW, "ZLIB": CODEC_ZLIB, "LZMA": CODEC_LZMA}
+
+
+class BdsketError(Exception):
+    pass
+
+
+class Section(NamedTuple):
+    kind: int
+    codec: int
+    name: str
+    offset: int
+    size: int
+    raw_size: int
+
+
+def padding(size: int) -> int:
+    return -size % ALIGN
+
+
+def array_start(meta_len: int) -> int:
+    start = META_LEN.size + meta_len
+    return start + padding(start)
+
+
+def pack_payload(meta: dict, arrays: Dict[str, np.ndarray]) -> bytes:
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    for name, array in arrays.items():
+        if array.dtype.byteorder == ">":
+            arrays[name] = array.astype(array.dtype.newbyteorder("<"))
+
+    # offsets are relative to the first array, which follows the JSON
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = [array.dtype.str, list(array.shape), offset]
+        offset += array.nbytes + padding(array.nbytes)
+    header = json.dumps({"meta": meta, "arrays": layout}).encode("utf-8")
+    chunks = [META_LEN.pack(len(header)), header]
+    chunks.append(bytes(array_start(len(header)) - META_LEN.size - len(header)))
+    for array in arrays.values():
+        chunks.append(array.tobytes())
+        chunks.append(bytes(padding(array.nbytes)))
+    return b"".join(chunks)
+
+
+def compress(payload: bytes, codec: int) -> bytes:
+    if codec == CODEC_ZLIB:
+        return zlib.compress(payload, 6)
+    if codec == CODEC_LZMA:
+        return lzma.compress(payload)
+    return payload
+
+
+def decompress(payload, codec: int) -> bytes:
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload)
+    if codec == CODEC_LZMA:
+        return lzma.decompress(payload)
+    raise BdsketError(f"unknown codec {codec}")
+
+
+class BdsketWriter:
+    """Appends sections to ``fileobj`` as they come, the table goes last.
+
+    Nothing but the small table is kept around, so memory use does not grow
+    with the number of sections. ``codec`` is the default compression of
+    every section.
+    """
+
+    def __init__(self, fileobj, codec=CODEC_RAW):
+        self.file = fileobj
+        self.codec = codec
+        self.sections: List[Section] = []
+        self.file.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0, 0))
+        self.file.write(bytes(padding(HEADER.size)))
+        self.position = HEADER.size + padding(HEADER.size)
+
+    def add_section(self, kind: int, name: str, meta: dict, arrays=None, codec=None):
+        payload = pack_payload(meta, arrays or {})
+        codec = self.codec if codec is None else codec
+        stored = compress(payload, codec)
+        if len(stored) >= len(payload):
+            # not worth it, keep the section mappable
+            stored, codec = payload, CODEC_RAW
+        self.write_payload(kind, name, stored, codec, len(payload))
+
+    def write_payload(self, kind, name, payload, codec, raw_size):
+        self.file.write(payload)
+        self.sections.append(
+            Section(kind, codec, name, self.position, len(payload), raw_size)
+        )
+        self.position += len(payload)
+        pad = padding(len(payload))
+        self.file.write(bytes(pad))
+        self.position += pad
+
+    def close(self):
+        table_offset = self.position
+        for section in self.sections:
+            name = section.name.encode("utf-8")
+            self.file.write(
+                ENTRY.pack(
+                    section.kind,
+                    section.codec,
+                    len(name),
+                    section.offset,
+                    section.size,
+                    section.raw_size,
+                )
+            )
+            self.file.write(name)
+        self.file.seek(0)
+        self.file.write(
+            HEADER.pack(MAGIC, VERSION, 0, len(self.sections), 0, table_offset)
+        )
+        self.file.seek(0, 2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+
+class BdsketReader:
+    """Memory mapped reader, only the sections asked for are touched."""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise BdsketError(f"{path} is empty")
+        magic, version, _, count, _, table_offset = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            self.close()
+            raise BdsketError(f"{path} is not a bdsket file")
+        if version > VERSION:
+            self.close()
+            raise BdsketError(f"{path} uses bdsket version {version}")
+
+        self.sections: List[Section] = []
+        position = table_offset
+        for _ in range(count):
+            kind, codec, name_len, offset, size, raw_size = ENTRY.unpack_from(
+                self.buffer, position
+            )
+            position += ENTRY.size
+            name = bytes(self.buffer[position : position + name_len]).decode("utf-8")
+            position += name_len
+            self.sections.append(Section(kind, codec, name, offset, size, raw_size))
+
+    def names(self, kind: int) -> List[str]:
+        return [section.name for section in self.sections if section.kind == kind]
+
+    def find(self, kind: int, name: str) -> Section:
+        for section in self.sections:
+            if section.kind == kind and section.name == name:
+                return section
+        raise KeyError(name)
+
+    def stored(self, section: Section) -> memoryview:
+        """The section bytes as they are in the file, possibly compressed."""
+        return memoryview(self.buffer)[section.offset : section.offset + section.size]
+
+    def payload(self, section: Section):
+        stored = self.stored(section)
+        if section.codec == CODEC_RAW:
+            return stored
+        payload = decompress(stored, section.codec)
+        if len(payload) != section.raw_size:
+            raise BdsketError(f"section {section.name} is corrupt")
+        return payload
+
+    def read(self, kind: int, name: str):
+        """Return ``(meta, arrays)`` of one section."""
+        payload = self.payload(self.find(kind, name))
+        (meta_len,) = META_LEN.unpack_from(payload, 0)
+        header = json.loads(bytes(payload[META_LEN.size : META_LEN.size + meta_len]))
+        start = array_start(meta_len)
+        arrays = {}
+        for array_name, (dtype, shape, offset) in header["arrays"].items():
+            dtype = np.dtype(dtype)
+            count = int(np.prod(shape)) if shape else 1
+            arrays[array_name] = np.frombuffer(
+                payload, dtype=dtype, count=count, offset=start + offset
+            ).reshape(shape)
+        return header["meta"], arrays
+
+    def close(self):
+        if getattr(self, "buffer", None) is not None:
+            try:
+                self.buffer.close()
+            except BufferError:
+                # arrays handed out still view the map, it closes with them
+                pass
+            self.buffer = None
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def index_dtype(count: int):
+    return np.uint16 if count <= 0xFFFF else np.uint32
+
+
+def ragged(rows, width):
+    """Flatten variable length rows into (offsets, values) arrays."""
+    offsets = np.zeros(len(rows) + 1, dtype=np.uint32)
+    offsets[1:] = np.cumsum([len(row) for row in rows])
+    values = np.asarray([item for row in rows for item in row], dtype=np.float32)
+    return offsets, values.reshape(-1, width)
+
+
+def write_texture(writer: BdsketWriter, name: str, texture: dict):
+    meta = {"texture": texture["texture"], "size": list(texture["size"])}
+    writer.add_section(KIND_TEXTURE, name, meta)
+
+
+def write_skeleton(writer: BdsketWriter, name: str, bones: List[dict]):
+    index = {bone["name"]: i for i, bone in enumerate(bones)}
+    arrays = {
+        "parents": np.asarray(
+            [index.get(bone["parent"], -1) for bone in bones], dtype=np.int32
+        ),
+        "head": np.asarray([bone["head"] for bone in bones], np.float32).reshape(-1, 2),
+        "tail": np.asarray([bone["tail"] for bone in bones], np.float32).reshape(-1, 2),
+        "angle": np.asarray([bone["angle"] for bone in bones], dtype=np.float32),
+    }
+    meta = {"bones": [bone["name"] for bone in bones]}
+    writer.add_section(KIND_SKELETON, name, meta, arrays)
+
+
+def write_mesh(writer: BdsketWriter, name: str, mesh: dict):
+    """Mesh section with fixed width skinning arrays.
+
+    ``mesh["bone_indices"]`` and ``mesh["bone_weights"]`` are (N, K) like
+    :func:`bone_dot.core.weights.pack_weights` makes them, the indices
+    point into the bones of the skeleton section.
+    """
+    vertices = np.asarray(mesh["vertices"], dtype=np.float32).reshape(-1, 2)
+    bone_weights = np.asarray(mesh["bone_weights"], dtype=np.float32)
+    arrays = {
+        "vertices": vertices,
+        "uvs": np.asarray(mesh["uvs"], dtype=np.float32).reshape(-1, 2),
+        "triangles": np.asarray(
+            mesh["triangles"], dtype=index_dtype(len(vertices))
+        ).reshape(-1, 3),
+        "bone_indices": np.asarray(mesh["bone_indices"]),
+        "bone_weights": bone_weights,
+    }
+    meta = {
+        "name": mesh["name"],
+        "texture": mesh["texture"],
+        "z_hint": mesh["z_hint"],
+        "influences": bone_weights.shape[1],
+    }
+    # "lods" lists the sections of the coarser levels on the full mesh,
+    # "screen_size" is set on those levels themselves
+    for key in ("trim", "lods", "screen_size"):
+        if key in mesh:
+            meta[key] = mesh[key]
+    writer.add_section(KIND_MESH, name, meta, arrays)
+
+
+def write_animation(writer: BdsketWriter, name: str, animation: dict):
+    tracks = animation["data"]["tracks"]
+    location_offsets, location_keys = ragged([track["location"] for track in tracks], 3)
+    rotation_offsets, rotation_keys = ragged([track["rotation"] for track in tracks], 2)
+    arrays = {
+        "location_offsets": location_offsets,
+        "location_keys": location_keys,
+        "rotation_offsets": rotation_offsets,
+        "rotation_keys": rotation_keys,
+    }
+    meta = {
+        "name": animation["name"],
+        "fps": animation["data"]["fps"],
+        "interpolation": animation["data"]["interpolation"],
+        "bones": [track["bone"] for track in tracks],
+    }
+    writer.add_section(KIND_ANIMATION, name, meta, arrays)
+
+
+def read_animation(reader: BdsketReader, name: str) -> dict:
+    """Rebuild the exporter's track lists from one animation section."""
+    meta, arrays = reader.read(KIND_ANIMATION, name)
+    loc_offsets = arrays["location_offsets"]
+    rot_offsets = arrays["rotation_offsets"]
+    tracks = []
+    for i, bone in enumerate(meta["bones"]):
+        location = arrays["location_keys"][loc_offsets[i] : loc_offsets[i + 1]]
+        rotation = arrays["rotation_keys"][rot_offsets[i] : rot_offsets[i + 1]]
+        tracks.append({"bone": bone, "location": location, "rotation": rotation})
+    data = {
+        "fps": meta["fps"],
+        # files written before the mode was recorded were all linear
+        "interpolation": meta.get("interpolation", "linear"),
+        "tracks": tracks,
+    }
+    return {"name": meta["name"], "data": data}
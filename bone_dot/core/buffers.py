@@ -0,0 +1,187 @@
+"""Vertex and index buffers compiled from Blender's loop level mesh data.
+
+Blender keeps UVs per loop, so a vertex on a UV seam has several. The
+buffers get one vertex per distinct combination of everything a vertex
+carries, then triangles are reordered for the post-transform vertex cache
+with Tipsify (Sander, Nehab and Barczak, "Fast Triangle Reordering for
+Vertex Locality and Reduced Overdraw", 2007) and vertices are renumbered
+in the order the triangles first use them.
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+CACHE_SIZE = 16
+
+
+def row_keys(columns) -> np.ndarray:
+    """One hashable void scalar per row of the given equally long arrays."""
+    parts = []
+    for column in columns:
+        column = np.asarray(column)
+        column = column.reshape(len(column), -1)
+        if column.dtype.kind == "f":
+            # -0.0 and 0.0 must not split a vertex
+            column = column.astype(np.float32) + np.float32(0.0)
+            column = column.view(np.uint32)
+        parts.append(column.astype(np.uint32))
+    keys = np.ascontiguousarray(np.concatenate(parts, axis=1))
+    return keys.view(np.dtype((np.void, keys.shape[1] * 4))).reshape(-1)
+
+
+def split_vertices(
+    triangle_loops: np.ndarray,
+    loop_vertices: np.ndarray,
+    vertex_arrays: Dict[str, np.ndarray],
+    loop_arrays: Dict[str, np.ndarray],
+) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Weld the loops of the triangles into unique vertices.
+
+    ``vertex_arrays`` hold one row per mesh vertex (position, weights),
+    ``loop_arrays`` one row per loop (UVs). Loops agreeing on every row end
+    up as one vertex, so seams split and duplicate vertices merge. Returns
+    the per vertex arrays under the same names and the (T, 3) triangles;
+    vertices are numbered by first use.
+    """
+    loops = np.asarray(triangle_loops, dtype=np.int64).reshape(-1)
+    verts = np.asarray(loop_vertices, dtype=np.int64)[loops]
+    columns = [np.asarray(array)[verts] for array in vertex_arrays.values()]
+    columns += [np.asarray(array)[loops] for array in loop_arrays.values()]
+    if not len(loops):
+        empty = {name: array[:0] for name, array in vertex_arrays.items()}
+        empty.update({name: array[:0] for name, array in loop_arrays.items()})
+        return empty, np.zeros((0, 3), dtype=np.int64)
+
+    _, first, inverse = np.unique(
+        row_keys(columns), return_index=True, return_inverse=True
+    )
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    picked = first[order]
+    arrays = {
+        name: column[picked]
+        for name, column in zip((*vertex_arrays, *loop_arrays), columns)
+    }
+    return arrays, rank[inverse.reshape(-1)].reshape(-1, 3)
+
+
+def vertex_triangles(triangles: np.ndarray, vertex_count: int):
+    """CSR adjacency: the triangles of vertex v are ``tris[starts[v]:starts[v+1]]``."""
+    corners = triangles.reshape(-1)
+    order = np.argsort(corners, kind="stable")
+    starts = np.zeros(vertex_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(corners, minlength=vertex_count), out=starts[1:])
+    return starts, order // 3
+
+
+def tipsify(triangles: np.ndarray, vertex_count: int, cache_size=CACHE_SIZE):
+    """Triangle order that keeps recently used vertices in a FIFO cache.
+
+    Fans around one vertex at a time and picks the next fanning vertex
+    among the ones just used that will still be cached. Runs in time
+    linear in the triangle count.
+    """
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    if len(triangles) < 2:
+        return triangles
+    starts, adjacent = vertex_triangles(triangles, vertex_count)
+    starts, adjacent = starts.tolist(), adjacent.tolist()
+    tris = triangles.tolist()
+    live = np.diff(starts).tolist()
+    cache_time = [0] * vertex_count
+    emitted = [False] * len(tris)
+    dead_end = []
+    output = []
+    stamp = cache_size + 1
+    cursor = 1
+    fan = 0
+    while fan >= 0:
+        candidates = []
+        for t in adjacent[starts[fan] : starts[fan + 1]]:
+            if emitted[t]:
+                continue
+            emitted[t] = True
+            output.append(t)
+            for v in tris[t]:
+                dead_end.append(v)
+                candidates.append(v)
+                live[v] -= 1
+                if stamp - cache_time[v] > cache_size:
+                    cache_time[v] = stamp
+                    stamp += 1
+
+        # the used vertex that stays cached longest while fanning it
+        fan = -1
+        best = -1
+        for v in candidates:
+            if live[v]:
+                age = stamp - cache_time[v]
+                priority = age if age + 2 * live[v] <= cache_size else 0
+                if priority > best:
+                    best, fan = priority, v
+        if fan >= 0:
+            continue
+        while dead_end:
+            v = dead_end.pop()
+            if live[v]:
+                fan = v
+                break
+        else:
+            while cursor < vertex_count and not live[cursor]:
+                cursor += 1
+            if cursor < vertex_count:
+                fan = cursor
+    return triangles[output]
+
+
+def renumber_by_first_use(
+    arrays: Dict[str, np.ndarray], triangles: np.ndarray
+) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Number vertices in the order the triangles reach them, unused ones last."""
+    corners = triangles.reshape(-1)
+    vertex_count = len(next(iter(arrays.values())))
+    first = np.full(vertex_count, len(corners), dtype=np.int64)
+    np.minimum.at(first, corners, np.arange(len(corners)))
+    order = np.argsort(first, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(vertex_count)
+    return {name: array[order] for name, array in arrays.items()}, rank[triangles]
+
+
+def cache_miss_ratio(triangles: np.ndarray, cache_size=CACHE_SIZE) -> float:
+    """Vertex shader runs per triangle with a FIFO cache (ACMR), 0.5 to 3."""
+    if not len(triangles):
+        return 0.0
+    cache = []
+    cached = set()
+    misses = 0
+    for v in np.asarray(triangles).reshape(-1).tolist():
+        if v in cached:
+            continue
+        misses += 1
+        cache.append(v)
+        cached.add(v)
+        if len(cache) > cache_size:
+            cached.discard(cache.pop(0))
+    return misses / len(triangles)
+
+
+def compile_mesh(
+    triangle_loops: np.ndarray,
+    loop_vertices: np.ndarray,
+    vertex_arrays: Dict[str, np.ndarray],
+    loop_arrays: Dict[str, np.ndarray],
+    optimize=True,
+    cache_size=CACHE_SIZE,
+) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Split the vertices, then with ``optimize`` reorder for the cache."""
+    arrays, triangles = split_vertices(
+        triangle_loops, loop_vertices, vertex_arrays, loop_arrays
+    )
+    if optimize and len(triangles):
+        vertex_count = len(next(iter(arrays.values())))
+        triangles = tipsify(triangles, vertex_count, cache_size)
+        arrays, triangles = renumber_by_first_use(arrays, triangles)
+    return arrays, triangles
@@ -0,0 +1,132 @@
+import hashlib
+import os
+import uuid
+
+import numpy as np
+
+CACHE_VERSION = 1
+
+
+class ContourCache:
+    """On-disk cache of cut results, evicted least recently used first.
+
+    Entries are keyed by the image path, size and mtime plus every cut
+    parameter, so editing the texture or changing a setting misses.
+    """
+
+    suffix = ".npz"
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, filepath, params: dict) -> str:
+        stat = os.stat(filepath)
+        blob = "|".join(
+            (
+                str(CACHE_VERSION),
+                os.path.normcase(os.path.realpath(filepath)),
+                str(stat.st_size),
+                str(stat.st_mtime_ns),
+                repr(sorted(params.items())),
+            )
+        )
+        return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+    def path(self, key) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with np.load(path) as data:
+                result = {name: data[name] for name in data.files}
+        except (OSError, ValueError, KeyError):
+            return None
+        # touching the entry keeps it at the young end of the LRU order
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        lengths = result.pop("contour_lengths")
+        points = result.pop("contour_points")
+        result["contours"] = np.split(points, np.cumsum(lengths)[:-1])
+        if not len(lengths):
+            result["contours"] = []
+        result["size"] = tuple(int(v) for v in result["size"])
+        result["vertex_count"] = int(result["vertex_count"])
+        result["stride_count"] = int(result["stride_count"])
+        if "lod_tolerances" in result:
+            result["lods"] = [
+                {
+                    "tolerance": float(tolerance),
+                    "points": result.pop(f"lod{i}_points"),
+                    "triangles": result.pop(f"lod{i}_triangles"),
+                }
+                for i, tolerance in enumerate(result.pop("lod_tolerances"))
+            ]
+        return result
+
+    def put(self, key, result: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        contours = result["contours"]
+        arrays = {
+            "size": np.asarray(result["size"], dtype=np.int64),
+            "vertex_count": np.asarray(result["vertex_count"]),
+            "stride_count": np.asarray(result["stride_count"]),
+            "contour_lengths": np.asarray([len(c) for c in contours], dtype=np.int64),
+            "contour_points": (
+                np.concatenate(contours) if contours else np.zeros((0, 2))
+            ),
+        }
+        if "triangles" in result:
+            arrays["points"] = result["points"]
+            arrays["triangles"] = result["triangles"]
+        if "lods" in result:
+            lods = result["lods"]
+            arrays["lod_tolerances"] = np.asarray(
+                [lod["tolerance"] for lod in lods], dtype=np.float64
+            )
+            for i, lod in enumerate(lods):
+                arrays[f"lod{i}_points"] = lod["points"]
+                arrays[f"lod{i}_triangles"] = lod["triangles"]
+
+        # write aside and rename so a crashed run never leaves half an entry
+        tmp_path = os.path.join(self.directory, f".{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, self.path(key))
+        self.evict()
+
+    def entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.suffix) and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self) -> int:
+        removed = 0
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
@@ -0,0 +1,110 @@
+from typing import List, NamedTuple
+
+import numpy as np
+from PIL import Image
+
+# edge directions in image space (y down): east, south, west, north
+DIRS = np.array([(1, 0), (0, 1), (-1, 0), (0, -1)], dtype=np.int64)
+
+
+class Contour(NamedTuple):
+    # (N, 2) pixel corner coordinates, closed implicitly (last -> first)
+    points: np.ndarray
+    is_hole: bool
+
+
+def alpha_mask(pil_image: Image.Image, alpha_thresh=1) -> np.ndarray:
+    if pil_image.mode != "RGBA":
+        pil_image = pil_image.convert("RGBA")
+    alpha = np.asarray(pil_image.getchannel("A"))
+    return alpha >= alpha_thresh
+
+
+def signed_area(points: np.ndarray) -> float:
+    x = points[:, 0].astype(np.float64)
+    y = points[:, 1].astype(np.float64)
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def boundary_edges(mask: np.ndarray):
+    """Directed pixel-border edges with the opaque side on the right (y down)."""
+    padded = np.pad(mask, 1)
+    inner = padded[1:-1, 1:-1]
+    top = inner & ~padded[:-2, 1:-1]
+    right = inner & ~padded[1:-1, 2:]
+    bottom = inner & ~padded[2:, 1:-1]
+    left = inner & ~padded[1:-1, :-2]
+
+    starts = []
+    dirs = []
+    for d, (edge_mask, ox, oy) in enumerate(
+        ((top, 0, 0), (right, 1, 0), (bottom, 1, 1), (left, 0, 1))
+    ):
+        ys, xs = np.nonzero(edge_mask)
+        starts.append(np.stack((xs + ox, ys + oy), axis=1))
+        dirs.append(np.full(len(xs), d, dtype=np.int64))
+    return np.concatenate(starts).astype(np.int64), np.concatenate(dirs)
+
+
+def link_edges(starts: np.ndarray, dirs: np.ndarray, width: int) -> np.ndarray:
+    """Successor of every edge; saddles turn left so opaque pixels are 8-connected."""
+    stride = width + 1
+    keys = (starts[:, 1] * stride + starts[:, 0]) * 4 + dirs
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    ends = starts + DIRS[dirs]
+    end_ids = (ends[:, 1] * stride + ends[:, 0]) * 4
+    succ = np.full(len(dirs), -1, dtype=np.int64)
+    # left, straight, right; a boundary never doubles back on itself
+    for turn in (3, 0, 1):
+        pending = succ < 0
+        if not pending.any():
+            break
+        wanted = end_ids[pending] + (dirs[pending] + turn) % 4
+        pos = np.searchsorted(sorted_keys, wanted)
+        pos = np.minimum(pos, len(sorted_keys) - 1)
+        hit = sorted_keys[pos] == wanted
+        idx = np.nonzero(pending)[0][hit]
+        succ[idx] = order[pos[hit]]
+    return succ
+
+
+def trace_contours(mask: np.ndarray, corners_only=False) -> List[Contour]:
+    """Trace every island and hole of a boolean mask as ordered corner loops.
+
+    Outer loops have positive signed area in image space, holes negative.
+    With ``corners_only`` the collinear vertices along straight runs are
+    dropped and only the points where the boundary turns are kept.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    if mask.ndim != 2 or not mask.any():
+        return []
+    h, w = mask.shape
+    starts, dirs = boundary_edges(mask)
+    succ = link_edges(starts, dirs, w).tolist()
+
+    visited = bytearray(len(succ))
+    contours = []
+    for first in range(len(succ)):
+        if visited[first]:
+            continue
+        loop = []
+        edge = first
+        while not visited[edge]:
+            visited[edge] = 1
+            loop.append(edge)
+            edge = succ[edge]
+        loop = np.asarray(loop, dtype=np.int64)
+        if corners_only:
+            loop_dirs = dirs[loop]
+            loop = loop[loop_dirs != np.roll(loop_dirs, 1)]
+        points = starts[loop]
+        contours.append(Contour(points, signed_area(points) < 0))
+    return contours
+
+
+def trace_alpha_contours(
+    pil_image: Image.Image, alpha_thresh=1, corners_only=False
+) -> List[Contour]:
+    return trace_contours(alpha_mask(pil_image, alpha_thresh), corners_only)
@@ -0,0 +1,148 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing import get_context
+from typing import List
+
+import numpy as np
+from PIL import Image
+
+from bone_dot.core.cache import ContourCache
+from bone_dot.core.contour import alpha_mask, trace_contours
+from bone_dot.core.simplify import simplify_contours, stride_sample
+from bone_dot.core.triangulate import triangulate_contours
+
+
+def stride_sample_count(corners, rate) -> int:
+    """Points the stride method keeps on a loop traced with ``corners_only``."""
+    # every pixel edge along the loop is one traced point
+    steps = int(np.abs(np.roll(corners, -1, axis=0) - corners).sum())
+    return -(-steps // max(int(rate), 1))
+
+
+def lod_meshes(contours_px: List[np.ndarray], levels: int, tolerance: float):
+    """Coarser meshes of the traced loops, the tolerance doubling per level.
+
+    Every level simplifies the traced loops themselves rather than the level
+    before it, so errors don't add up. Stops early once a level loses every
+    triangle.
+    """
+    lods = []
+    for level in range(levels):
+        level_tolerance = tolerance * 2**level
+        points, triangles = triangulate_contours(
+            simplify_contours(contours_px, level_tolerance)
+        )
+        if not len(triangles):
+            break
+        lods.append(
+            {"tolerance": level_tolerance, "points": points, "triangles": triangles}
+        )
+    return lods
+
+
+def cut_sprite(
+    filepath,
+    simplify_mode="STRIDE",
+    sample_rate=16,
+    tolerance=1.0,
+    max_vertices=0,
+    triangulate=False,
+    alpha_thresh=1,
+    lod_levels=0,
+    lod_tolerance=2.0,
+):
+    """Decode, trace and simplify one sprite image, no bpy involved."""
+    timings = {}
+    start = time.perf_counter()
+    with Image.open(filepath) as pil_img:
+        size = pil_img.size
+        mask = alpha_mask(pil_img, alpha_thresh)
+    timings["decode"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    contours = trace_contours(mask, corners_only=simplify_mode != "STRIDE")
+    timings["trace"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if simplify_mode == "STRIDE":
+        contours_px = [stride_sample(c.points, sample_rate) for c in contours]
+        stride_count = sum(len(points) for points in contours_px)
+    else:
+        contours_px = simplify_contours(
+            [c.points for c in contours], tolerance, max_vertices
+        )
+        stride_count = sum(stride_sample_count(c.points, sample_rate) for c in contours)
+    timings["simplify"] = time.perf_counter() - start
+
+    result = {
+        "filepath": filepath,
+        "size": size,
+        "contours": contours_px,
+        "vertex_count": sum(len(points) for points in contours_px),
+        "stride_count": stride_count,
+        "timings": timings,
+    }
+    if triangulate:
+        start = time.perf_counter()
+        result["points"], result["triangles"] = triangulate_contours(contours_px)
+        timings["triangulate"] = time.perf_counter() - start
+    if lod_levels:
+        start = time.perf_counter()
+        result["lods"] = lod_meshes(
+            [c.points for c in contours], lod_levels, lod_tolerance
+        )
+        timings["lods"] = time.perf_counter() - start
+    return result
+
+
+def safe_cut_sprite(filepath, params):
+    try:
+        return cut_sprite(filepath, **params)
+    except Exception as e:
+        return {"filepath": filepath, "error": str(e)}
+
+
+def cut_sprites(
+    filepaths: List[str], params: dict, workers=0, cache: ContourCache = None
+) -> List[dict]:
+    """Cut many sprites, in a process pool unless ``workers`` is 1.
+
+    Results come back in the order of ``filepaths``; a failed sprite gets a
+    dict with an ``error`` message instead of raising. With a ``cache`` the
+    sprites whose image and parameters are unchanged skip decoding entirely.
+    """
+    results = [None] * len(filepaths)
+    keys = [None] * len(filepaths)
+    if cache is not None:
+        for i, filepath in enumerate(filepaths):
+            start = time.perf_counter()
+            try:
+                keys[i] = cache.key(filepath, params)
+            except OSError:
+                continue
+            cached = cache.get(keys[i])
+            if cached is not None:
+                cached["filepath"] = filepath
+                cached["timings"] = {"cache": time.perf_counter() - start}
+                results[i] = cached
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    pending_paths = [filepaths[i] for i in pending]
+    if workers == 1 or len(pending) < 2:
+        computed = [safe_cut_sprite(filepath, params) for filepath in pending_paths]
+    else:
+        # spawn: forking Blender itself is neither safe nor cheap
+        with ProcessPoolExecutor(
+            max_workers=workers or None, mp_context=get_context("spawn")
+        ) as pool:
+            computed = list(pool.map(safe_cut_sprite, pending_paths, repeat(params)))
+
+    for i, result in zip(pending, computed):
+        results[i] = result
+        if cache is not None and keys[i] is not None and "error" not in result:
+            try:
+                cache.put(keys[i], result)
+            except OSError:
+                pass
+    return results
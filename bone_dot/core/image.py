@@ -0,0 +1,26 @@
+"""Opaque pixel boxes of sprite images."""
+
+import numpy as np
+from PIL import Image
+
+
+def alpha_bbox(alpha: np.ndarray, alpha_thresh=1):
+    """``(x0, y0, x1, y1)`` of the opaque pixels, ``None`` if there are none."""
+    mask = alpha >= alpha_thresh
+    cols = np.flatnonzero(mask.any(axis=0))
+    if not len(cols):
+        return None
+    rows = np.flatnonzero(mask.any(axis=1))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def image_alpha_bbox(filepath, alpha_thresh=1):
+    """Opaque box of an image file and its size, the whole image without alpha."""
+    with Image.open(filepath) as pil_img:
+        size = pil_img.size
+        if pil_img.mode not in ("RGBA", "LA", "PA") and (
+            "transparency" not in pil_img.info
+        ):
+            return (0, 0, *size), size
+        alpha = np.asarray(pil_img.convert("RGBA").getchannel("A"))
+    return alpha_bbox(alpha, alpha_thresh), size
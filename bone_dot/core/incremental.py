@@ -0,0 +1,159 @@
+"""Re-export only the .bdsket sections whose source content changed.
+
+A manifest next to the output keeps one content hash per section. When
+the next export computes the same hash, the section's stored bytes are
+copied over from the previous file instead of being extracted again.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+
+import numpy as np
+
+from bone_dot.core.bdsket import BdsketError, BdsketReader, BdsketWriter
+
+MANIFEST_VERSION = 2
+
+
+def content_hash(*parts) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            part = np.ascontiguousarray(part)
+            digest.update(f"{part.dtype.str}{part.shape}".encode("utf-8"))
+            digest.update(part.tobytes())
+        elif isinstance(part, bytes):
+            digest.update(part)
+        else:
+            digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def section_key(kind: int, name: str) -> str:
+    # names are only unique within a kind, an action may be named like a mesh
+    return f"{kind}:{name}"
+
+
+def manifest_path(output) -> str:
+    return output + ".manifest.json"
+
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class IncrementalExport:
+    """Writes a .bdsket through a temp file, reusing unchanged sections.
+
+    Use :meth:`reuse` before extracting a section; when it returns False
+    extract and write the section, then :meth:`record` its hash. Closing
+    moves the new file and manifest into place.
+    """
+
+    def __init__(self, output, codec, enabled=True):
+        self.output = output
+        self.tmp_path = os.path.join(
+            os.path.dirname(os.path.abspath(output)), f".{uuid.uuid4().hex}.tmp"
+        )
+        self.previous = self.load_previous() if enabled else {}
+        self.reader = None
+        if self.previous:
+            try:
+                self.reader = BdsketReader(output)
+            except (OSError, BdsketError):
+                self.previous = {}
+        self.hashes = {}
+        self.reused = []
+        self.rebuilt = []
+        self.file = open(self.tmp_path, "wb")
+        self.writer = BdsketWriter(self.file, codec)
+
+    def load_previous(self) -> dict:
+        try:
+            with open(manifest_path(self.output), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            stamp = file_stamp(self.output)
+        except (OSError, ValueError):
+            return {}
+        # a file written by something else since invalidates every hash
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("file") != stamp:
+            return {}
+        return manifest.get("sections", {})
+
+    def unchanged(self, kind: int, name: str, digest: str) -> bool:
+        if self.previous.get(section_key(kind, name)) != digest:
+            return False
+        try:
+            self.reader.find(kind, name)
+        except KeyError:
+            return False
+        return True
+
+    def reuse(self, kind: int, name: str, digest: str) -> bool:
+        if not self.unchanged(kind, name, digest):
+            return False
+        section = self.reader.find(kind, name)
+        stored = self.reader.stored(section)
+        try:
+            self.writer.write_payload(
+                kind, name, stored, section.codec, section.raw_size
+            )
+        finally:
+            stored.release()
+        self.hashes[section_key(kind, name)] = digest
+        self.reused.append(name)
+        return True
+
+    def reuse_all(self, kind: int, digests: dict) -> bool:
+        """Reuse every section in ``{name: digest}`` or none of them.
+
+        For sections extracted together, where copying some and writing
+        all would store the copied ones twice.
+        """
+        if not all(
+            self.unchanged(kind, name, digest) for name, digest in digests.items()
+        ):
+            return False
+        for name, digest in digests.items():
+            self.reuse(kind, name, digest)
+        return True
+
+    def record(self, kind: int, name: str, digest: str):
+        self.hashes[section_key(kind, name)] = digest
+        self.rebuilt.append(name)
+
+    def close(self):
+        self.writer.close()
+        self.file.close()
+        if self.reader is not None:
+            self.reader.close()
+        os.replace(self.tmp_path, self.output)
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "file": file_stamp(self.output),
+            "sections": self.hashes,
+        }
+        with open(manifest_path(self.output), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+
+    def abort(self):
+        self.file.close()
+        if self.reader is not None:
+            self.reader.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
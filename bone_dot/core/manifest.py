@@ -0,0 +1,150 @@
+"""Streaming reader for sprite layout manifests.
+
+A manifest is a JSON array of entries, an object holding that array under
+``"sprites"``, or JSON lines with one entry per line::
+
+    {"sprites": [
+        {"file": "arm.png", "pos": [120, 48], "z": 3,
+         "pivot": [0.5, 0.1], "parent": "upper_arm"}
+    ]}
+
+``pos`` is the top left corner of the image on the canvas in pixels, y
+down like the art tools export it. ``z`` orders the sprites, higher is
+drawn on top. ``pivot`` is where the object origin goes, as a fraction of
+the image size, and ``parent`` names the bone the sprite follows. Only
+``file`` is required; relative files are resolved against the manifest.
+"""
+
+import json
+import os
+from typing import Iterator
+
+CHUNK_SIZE = 64 * 1024
+
+decoder = json.JSONDecoder()
+
+
+class ManifestError(ValueError):
+    pass
+
+
+class JsonStream:
+    """Pull whole JSON values out of a file read in chunks."""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.file = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # drop what was consumed so the buffer never holds the whole file
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next character that is not white space, ``""`` at the end."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ManifestError(f"expected {char!r} in manifest")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if not self.fill():
+                    raise ManifestError(f"broken manifest: {e}") from None
+                continue
+            if end == len(self.buffer) and not self.eof:
+                # a number or literal may go on in the next chunk
+                if self.fill():
+                    continue
+            self.pos = end
+            return value
+
+    def array(self) -> Iterator:
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise ManifestError("expected ',' or ']' in manifest")
+
+
+def iter_entries(f, chunk_size=CHUNK_SIZE) -> Iterator[dict]:
+    stream = JsonStream(f, chunk_size)
+    first = stream.peek()
+    if first == "[":
+        yield from stream.array()
+        return
+    if first != "{":
+        raise ManifestError("manifest must hold a list of sprites")
+
+    # an object with the list under "sprites", or JSON lines of entries
+    stream.expect("{")
+    entry = {}
+    while stream.peek() != "}":
+        key = stream.value()
+        stream.expect(":")
+        if key == "sprites" and stream.peek() == "[":
+            yield from stream.array()
+        else:
+            entry[key] = stream.value()
+        if stream.peek() == ",":
+            stream.pos += 1
+    stream.pos += 1
+    if "file" in entry:
+        yield entry
+        while stream.peek():
+            yield stream.value()
+
+
+def iter_manifest(path, chunk_size=CHUNK_SIZE) -> Iterator[dict]:
+    """Normalised entries of the manifest at ``path``, read incrementally."""
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, "r", encoding="utf-8") as f:
+        for index, entry in enumerate(iter_entries(f, chunk_size)):
+            yield parse_entry(entry, base_dir, index)
+
+
+def parse_entry(entry, base_dir, index=0) -> dict:
+    if not isinstance(entry, dict) or not isinstance(entry.get("file"), str):
+        raise ManifestError(f"sprite {index} has no file")
+    try:
+        pos = [float(v) for v in entry.get("pos", (0, 0))][:2]
+        pivot = entry.get("pivot")
+        return {
+            "file": os.path.join(base_dir, entry["file"]),
+            "name": entry.get("name"),
+            "pos": (pos + [0.0, 0.0])[:2],
+            "z": float(entry.get("z", index)),
+            "pivot": None if pivot is None else [float(v) for v in pivot][:2],
+            "parent": entry.get("parent"),
+        }
+    except (TypeError, ValueError):
+        raise ManifestError(f"sprite {index} has a malformed field") from None
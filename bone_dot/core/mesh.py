@@ -0,0 +1,80 @@
+import numpy as np
+
+
+def world_positions(co: np.ndarray, matrix) -> np.ndarray:
+    """Apply a 4x4 world matrix to (N, 3) local coordinates in one go."""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    return co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def changed_vertex_uvs(loop_vertices: np.ndarray, loop_uvs: np.ndarray, previous=None):
+    """Vertices whose loop UVs moved since ``previous``, with their new UV.
+
+    Without a usable ``previous`` snapshot every vertex counts as changed.
+    A vertex on a seam takes the UV of its last changed loop.
+    """
+    if previous is None or previous.shape != loop_uvs.shape:
+        changed = np.ones(len(loop_uvs), dtype=bool)
+    else:
+        changed = np.any(loop_uvs != previous, axis=1)
+    loops = np.nonzero(changed)[0][::-1]
+    verts, first = np.unique(loop_vertices[loops], return_index=True)
+    return verts, loop_uvs[loops[first]]
+
+
+def trim_offset(rect, size):
+    """Pixel offset of a trimmed ``rect``'s centre from the image centre."""
+    if not rect:
+        return 0.0, 0.0
+    x0, y0, x1, y1 = rect
+    return (x0 + x1 - size[0]) / 2, (y0 + y1 - size[1]) / 2
+
+
+def pivot_origin(size, pivot):
+    """Pixel offset from the image centre of a ``pivot`` given in fractions."""
+    return (pivot[0] - 0.5) * size[0], (pivot[1] - 0.5) * size[1]
+
+
+def sprite_origin(obj, size):
+    """Pixel offset of a sprite object's origin from its image centre."""
+    if "bonedot_origin" in obj:
+        return tuple(obj["bonedot_origin"])
+    return trim_offset(obj.get("bonedot_trim"), size)
+
+
+def uv_to_local(uvs: np.ndarray, size, scale, offset=(0.0, 0.0)) -> np.ndarray:
+    """Local xy of sprite vertices sitting at ``uvs`` on a ``size`` image.
+
+    ``offset`` is the :func:`sprite_origin` of the sprite object.
+    """
+    w, h = size
+    return np.column_stack(
+        (
+            (uvs[:, 0] * w - w / 2 - offset[0]) * scale,
+            ((1 - uvs[:, 1]) * h - h / 2 - offset[1]) * scale,
+        )
+    )
+
+
+def sprite_quad(size, scale, rect=None):
+    """Corners and UVs of a quad showing a ``size`` image.
+
+    The quad covers the whole image, or only the pixel box ``rect`` as
+    ``(x0, y0, x1, y1)``. It is centred on the origin and faces -Z like
+    every imported sprite; corner ``i`` uses UV ``i``.
+    """
+    w, h = size
+    x0, y0, x1, y1 = rect or (0, 0, w, h)
+    x = (x1 - x0) * scale / 2
+    y = (y1 - y0) * scale / 2
+    verts = np.array([(-x, y, 0), (x, y, 0), (x, -y, 0), (-x, -y, 0)])
+    uvs = np.array(
+        [
+            (x0 / w, 1 - y1 / h),
+            (x1 / w, 1 - y1 / h),
+            (x1 / w, 1 - y0 / h),
+            (x0 / w, 1 - y0 / h),
+        ],
+        dtype=np.float32,
+    )
+    return verts, uvs
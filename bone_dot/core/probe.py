@@ -0,0 +1,109 @@
+"""Image sizes read from file headers, without decoding any pixels."""
+
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from PIL import Image
+
+from bone_dot.core.image import image_alpha_bbox
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+# start of frame markers, the others in C0-CF are DHT, JPG and DAC
+JPEG_SOF = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def png_size(head: bytes):
+    if head[:8] == PNG_MAGIC and head[12:16] == b"IHDR":
+        return struct.unpack(">II", head[16:24])
+    return None
+
+
+def webp_size(head: bytes):
+    if head[:4] != b"RIFF" or head[8:12] != b"WEBP":
+        return None
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        w, h = struct.unpack("<HH", head[26:30])
+        return w & 0x3FFF, h & 0x3FFF
+    if chunk == b"VP8L" and head[20] == 0x2F:
+        (bits,) = struct.unpack("<I", head[21:25])
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        w = int.from_bytes(head[24:27], "little") + 1
+        h = int.from_bytes(head[27:30], "little") + 1
+        return w, h
+    return None
+
+
+def jpeg_size(f):
+    """Walk the JPEG markers up to the first start of frame."""
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] == 0xFF:
+            # fill byte, the marker code follows
+            f.seek(-1, 1)
+            continue
+        if marker[1] in (0x01, *range(0xD0, 0xD8)):
+            continue
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        (length,) = struct.unpack(">H", length)
+        if marker[1] in JPEG_SOF:
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            h, w = struct.unpack(">HH", data[1:5])
+            return w, h
+        f.seek(length - 2, 1)
+
+
+def probe_size(filepath) -> Optional[Tuple[int, int]]:
+    """``(width, height)`` of an image file, from its header alone."""
+    with open(filepath, "rb") as f:
+        head = f.read(32)
+        size = png_size(head) or webp_size(head)
+        if size is None and head[:2] == b"\xff\xd8":
+            size = jpeg_size(f)
+    if size is None:
+        # any other format PIL knows, which also only parses the header
+        with Image.open(filepath) as pil_img:
+            size = pil_img.size
+    return tuple(int(v) for v in size)
+
+
+def sprite_layout(filepath, trim=False):
+    """Size and, with ``trim``, opaque pixel box of a sprite file.
+
+    The box is ``None`` when nothing can be cropped. Trimming has to decode
+    the alpha channel; without it only the header is read.
+    """
+    if not trim:
+        return probe_size(filepath), None
+    rect, size = image_alpha_bbox(filepath)
+    if rect is None or rect == (0, 0, *size):
+        rect = None
+    return tuple(size), rect
+
+
+def safe_sprite_layout(filepath, trim=False):
+    try:
+        return sprite_layout(filepath, trim)
+    except (OSError, ValueError, struct.error):
+        return None, None
+
+
+def sprite_layouts(filepaths: List[str], trim=False, workers=0) -> list:
+    """:func:`sprite_layout` of many files in a thread pool, in order.
+
+    Reading headers is I/O bound and decoding releases the GIL, so threads
+    overlap well here. Unreadable files give ``(None, None)``.
+    """
+    if len(filepaths) < 2 or workers == 1:
+        return [safe_sprite_layout(filepath, trim) for filepath in filepaths]
+    with ThreadPoolExecutor(max_workers=workers or None) as pool:
+        return list(pool.map(safe_sprite_layout, filepaths, [trim] * len(filepaths)))
@@ -0,0 +1,131 @@
+"""Nested timing spans and counters, written out as Chrome trace events.
+
+Disabled, :meth:`Profiler.span` hands out one shared no-op context manager
+and :meth:`Profiler.count` returns straight away, so instrumented code pays
+for a method call and nothing else. A written trace opens in
+``chrome://tracing`` or https://ui.perfetto.dev.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import List, Tuple
+
+NULL_SPAN = nullcontext()
+
+
+class Span:
+    __slots__ = ("profiler", "name", "args", "path", "start")
+
+    def __init__(self, profiler, name: str, args: dict):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        profiler = self.profiler
+        profiler.stack.append(self.name)
+        self.path = tuple(profiler.stack)
+        # entered here so a parent sorts before its children in the summary
+        profiler.totals.setdefault(self.path, [0.0, 0])
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        profiler = self.profiler
+        profiler.stack.pop()
+        total = profiler.totals.setdefault(self.path, [0.0, 0])
+        total[0] += end - self.start
+        total[1] += 1
+        event = {
+            "name": self.name,
+            "ph": "X",
+            "ts": profiler.timestamp(self.start),
+            "dur": (end - self.start) * 1e6,
+        }
+        if self.args:
+            event["args"] = self.args
+        profiler.event(event)
+
+
+class Profiler:
+    def __init__(self, max_events=200_000):
+        self.enabled = False
+        # a long UV sync session must not grow the trace without bound
+        self.max_events = max_events
+        self.clear()
+
+    def clear(self):
+        self.origin = time.perf_counter()
+        self.events = []
+        self.dropped = 0
+        self.totals = {}
+        self.counters = {}
+        self.stack = []
+
+    def timestamp(self, seconds: float) -> float:
+        return (seconds - self.origin) * 1e6
+
+    def event(self, event: dict):
+        if len(self.events) < self.max_events:
+            event["pid"] = os.getpid()
+            event["tid"] = threading.get_ident()
+            self.events.append(event)
+        else:
+            self.dropped += 1
+
+    def span(self, name: str, **args):
+        """Context manager timing the block inside the currently open span."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, args)
+
+    def count(self, name: str, value=1):
+        if not self.enabled:
+            return
+        total = self.counters.get(name, 0) + value
+        self.counters[name] = total
+        self.event(
+            {
+                "name": name,
+                "ph": "C",
+                "ts": self.timestamp(time.perf_counter()),
+                "args": {name: total},
+            }
+        )
+
+    def add(self, name: str, seconds: float, calls=1):
+        """Time measured elsewhere, like in a worker process.
+
+        It shows in the summary under the open span but not in the trace,
+        which only has the spans timed on this process's clock.
+        """
+        if not self.enabled:
+            return
+        total = self.totals.setdefault((*self.stack, name), [0.0, 0])
+        total[0] += seconds
+        total[1] += calls
+
+    def summary(self) -> List[Tuple[int, str, float, int]]:
+        """``(depth, name, seconds, calls)`` rows, parents before children."""
+        return [
+            (len(path) - 1, path[-1], seconds, calls)
+            for path, (seconds, calls) in self.totals.items()
+        ]
+
+    def trace(self) -> dict:
+        return {
+            "traceEvents": self.events,
+            "displayTimeUnit": "ms",
+            "otherData": {"dropped_events": self.dropped},
+        }
+
+    def write_trace(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.trace(), f)
+
+
+profiler = Profiler()
@@ -0,0 +1,83 @@
+"""Cells of a sprite sheet, as (N, 4) arrays of x0, y0, x1, y1 pixel boxes."""
+
+import json
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image
+
+
+def grid_cells(size, tile, margin=0, spacing=0) -> np.ndarray:
+    """Row major cells of a regular grid, partial cells at the edges dropped."""
+    w, h = size
+    tw, th = tile
+    if tw <= 0 or th <= 0:
+        raise ValueError("tile size must be positive")
+    xs = np.arange(margin, w - tw + 1, tw + spacing)
+    ys = np.arange(margin, h - th + 1, th + spacing)
+    x0, y0 = np.meshgrid(xs, ys)
+    x0, y0 = x0.reshape(-1), y0.reshape(-1)
+    return np.column_stack((x0, y0, x0 + tw, y0 + th)).astype(np.int64)
+
+
+def read_rects(path):
+    """Cells and names from a JSON rect list.
+
+    Accepts a list of ``[x, y, w, h]`` or ``{"x", "y", "w", "h", "name"}``
+    items, or a TexturePacker style ``{"frames": {name: {"frame": ...}}}``.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict) and "frames" in data:
+        frames = data["frames"]
+        if isinstance(frames, dict):
+            items = [dict(frame["frame"], name=name) for name, frame in frames.items()]
+        else:
+            items = [
+                dict(frame["frame"], name=frame.get("filename")) for frame in frames
+            ]
+    else:
+        items = data
+    cells = []
+    names: List[Optional[str]] = []
+    for item in items:
+        if isinstance(item, dict):
+            x, y, w, h = item["x"], item["y"], item["w"], item["h"]
+            names.append(item.get("name"))
+        else:
+            x, y, w, h = item
+            names.append(None)
+        cells.append((x, y, x + w, y + h))
+    return np.asarray(cells, dtype=np.int64).reshape(-1, 4), names
+
+
+def clip_cells(cells: np.ndarray, size) -> np.ndarray:
+    """Keep-mask of the cells that are non empty and inside the image."""
+    w, h = size
+    return (
+        (cells[:, 0] >= 0)
+        & (cells[:, 1] >= 0)
+        & (cells[:, 2] <= w)
+        & (cells[:, 3] <= h)
+        & (cells[:, 2] > cells[:, 0])
+        & (cells[:, 3] > cells[:, 1])
+    )
+
+
+def opaque_cells(mask: np.ndarray, cells: np.ndarray) -> np.ndarray:
+    """Keep-mask of the cells holding at least one opaque pixel.
+
+    Uses a summed area table, so the test costs four lookups per cell no
+    matter how many cells the sheet has.
+    """
+    table = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int64)
+    table[1:, 1:] = mask.cumsum(axis=0).cumsum(axis=1)
+    x0, y0, x1, y1 = cells.T
+    counts = table[y1, x1] - table[y0, x1] - table[y1, x0] + table[y0, x0]
+    return counts > 0
+
+
+def sheet_alpha_mask(filepath, alpha_thresh=1) -> np.ndarray:
+    with Image.open(filepath) as pil_img:
+        alpha = np.asarray(pil_img.convert("RGBA").getchannel("A"))
+    return alpha >= alpha_thresh
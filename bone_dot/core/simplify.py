@@ -0,0 +1,118 @@
+import heapq
+from typing import List
+
+import numpy as np
+
+
+def stride_sample(points: np.ndarray, rate: int) -> np.ndarray:
+    return points[:: max(int(rate), 1)]
+
+
+def segment_distances(points: np.ndarray, a: np.ndarray, b: np.ndarray):
+    ab = b - a
+    length_sq = float(np.dot(ab, ab))
+    ap = points - a
+    if length_sq == 0.0:
+        return np.hypot(ap[:, 0], ap[:, 1])
+    t = np.clip((ap @ ab) / length_sq, 0.0, 1.0)
+    closest = ap - np.outer(t, ab)
+    return np.hypot(closest[:, 0], closest[:, 1])
+
+
+def rdp_open(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Ramer-Douglas-Peucker keep-mask for an open polyline."""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        dist = segment_distances(points[first + 1 : last], points[first], points[last])
+        index = int(np.argmax(dist))
+        if dist[index] > tolerance:
+            index += first + 1
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return keep
+
+
+def rdp_closed(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Simplify a closed loop so no dropped point is further than ``tolerance``."""
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) <= 3:
+        return points
+    # split the loop at the point farthest from the first one
+    offsets = points - points[0]
+    far = int(np.argmax(np.einsum("ij,ij->i", offsets, offsets)))
+    if far == 0:
+        return points[:1]
+    first_half = rdp_open(points[: far + 1], tolerance)
+    second_half = rdp_open(np.concatenate((points[far:], points[:1])), tolerance)
+    keep = np.concatenate((first_half[:-1], second_half[:-1]))
+    return points[keep]
+
+
+def triangle_areas(points: np.ndarray) -> np.ndarray:
+    prev = np.roll(points, 1, axis=0)
+    nxt = np.roll(points, -1, axis=0)
+    return 0.5 * np.abs(
+        (prev[:, 0] - points[:, 0]) * (nxt[:, 1] - points[:, 1])
+        - (nxt[:, 0] - points[:, 0]) * (prev[:, 1] - points[:, 1])
+    )
+
+
+def visvalingam_closed(points: np.ndarray, max_vertices: int) -> np.ndarray:
+    """Drop the least significant vertices of a closed loop until it fits."""
+    points = np.asarray(points, dtype=np.float64)
+    count = len(points)
+    max_vertices = max(int(max_vertices), 3)
+    if count <= max_vertices:
+        return points
+
+    prev = [(i - 1) % count for i in range(count)]
+    nxt = [(i + 1) % count for i in range(count)]
+    areas = triangle_areas(points).tolist()
+    alive = [True] * count
+    heap = [(area, i) for i, area in enumerate(areas)]
+    heapq.heapify(heap)
+
+    def area_at(i):
+        (ax, ay), (bx, by), (cx, cy) = points[prev[i]], points[i], points[nxt[i]]
+        return 0.5 * abs((ax - bx) * (cy - by) - (cx - bx) * (ay - by))
+
+    while count > max_vertices and heap:
+        area, i = heapq.heappop(heap)
+        if not alive[i] or area != areas[i]:
+            continue
+        alive[i] = False
+        count -= 1
+        p, n = prev[i], nxt[i]
+        nxt[p], prev[n] = n, p
+        # a neighbour never becomes less significant than the vertex just removed
+        for j in (p, n):
+            areas[j] = max(area_at(j), area)
+            heapq.heappush(heap, (areas[j], j))
+    return points[np.asarray(alive)]
+
+
+def split_budget(counts: List[int], max_vertices: int) -> List[int]:
+    """Share a per-sprite vertex budget between loops, at least 3 each."""
+    total = sum(counts)
+    if max_vertices <= 0 or total <= max_vertices:
+        return list(counts)
+    shares = np.maximum(np.floor(np.asarray(counts) * max_vertices / total), 3)
+    return np.minimum(shares, counts).astype(int).tolist()
+
+
+def simplify_contours(
+    contours_px: List[np.ndarray], tolerance: float, max_vertices=0
+) -> List[np.ndarray]:
+    simplified = [rdp_closed(points, tolerance) for points in contours_px]
+    simplified = [points for points in simplified if len(points) >= 3]
+    budgets = split_budget([len(points) for points in simplified], max_vertices)
+    return [
+        visvalingam_closed(points, budget)
+        for points, budget in zip(simplified, budgets)
+    ]
@@ -0,0 +1,257 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from bone_dot.core.contour import signed_area
+
+
+def cross(o, a, b):
+    return (a[..., 0] - o[..., 0]) * (b[..., 1] - o[..., 1]) - (
+        a[..., 1] - o[..., 1]
+    ) * (b[..., 0] - o[..., 0])
+
+
+def points_in_polygon(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Even-odd test of many points against one polygon."""
+    px = points[:, 0:1]
+    py = points[:, 1:2]
+    ax, ay = polygon[:, 0], polygon[:, 1]
+    bx, by = np.roll(ax, -1), np.roll(ay, -1)
+    straddle = (ay > py) != (by > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_cross = ax + (py - ay) * (bx - ax) / (by - ay)
+    return np.count_nonzero(straddle & (px < x_cross), axis=1) % 2 == 1
+
+
+def group_contours(contours_px: List[np.ndarray]):
+    """Pair every hole with the outer loop that encloses it."""
+    outers = []
+    holes = []
+    for points in contours_px:
+        points = np.asarray(points, dtype=np.float64)
+        if len(points) < 3:
+            continue
+        area = signed_area(points)
+        if area > 0:
+            outers.append((points, area))
+        elif area < 0:
+            holes.append((points, -area))
+
+    groups = [(points, []) for points, _ in outers]
+    for hole, hole_area in holes:
+        best = None
+        best_score = None
+        for i, (outer, outer_area) in enumerate(outers):
+            if outer_area < hole_area:
+                continue
+            inside = np.count_nonzero(points_in_polygon(hole, outer))
+            score = (inside, -outer_area)
+            if inside and (best_score is None or score > best_score):
+                best, best_score = i, score
+        if best is not None:
+            groups[best][1].append(hole)
+    return groups
+
+
+def in_sector(a, p, c, d) -> bool:
+    """Whether direction ``d`` leaves vertex ``p`` into the polygon interior."""
+    left_in = (p[0] - a[0]) * d[1] - (p[1] - a[1]) * d[0] > 0
+    left_out = (c[0] - p[0]) * d[1] - (c[1] - p[1]) * d[0] > 0
+    if cross(a, p, c) >= 0:
+        return left_in and left_out
+    return left_in or left_out
+
+
+def bridge_is_clear(m, p, seg_a, seg_b, vertices) -> bool:
+    d = p - m
+    o1 = d[0] * (seg_a[:, 1] - m[1]) - d[1] * (seg_a[:, 0] - m[0])
+    o2 = d[0] * (seg_b[:, 1] - m[1]) - d[1] * (seg_b[:, 0] - m[0])
+    e = seg_b - seg_a
+    o3 = e[:, 0] * (m[1] - seg_a[:, 1]) - e[:, 1] * (m[0] - seg_a[:, 0])
+    o4 = e[:, 0] * (p[1] - seg_a[:, 1]) - e[:, 1] * (p[0] - seg_a[:, 0])
+    if np.any((o1 * o2 < 0) & (o3 * o4 < 0)):
+        return False
+    # no vertex may sit on the bridge itself
+    rel = vertices - m
+    on_line = d[0] * rel[:, 1] - d[1] * rel[:, 0] == 0
+    t = rel @ d
+    between = (t > 0) & (t < float(d @ d))
+    return not np.any(on_line & between)
+
+
+def separate_copies(loops: List[np.ndarray], epsilon=1e-3) -> List[np.ndarray]:
+    """Nudge vertices that several loop corners share apart.
+
+    Opaque pixels touching diagonally, holes touching their outline and
+    bridge edges all leave loops that meet at a single point, which ear
+    clipping cannot tell apart. Each copy steps a tiny bit into the wedge
+    between its own two edges that no other edge at that point enters, so
+    the loops become strictly simple; the copies are welded back later.
+    """
+    points = np.concatenate(loops)
+    _, inverse, counts = np.unique(
+        points, axis=0, return_inverse=True, return_counts=True
+    )
+    inverse = inverse.reshape(-1)
+    if counts.max() < 2:
+        return loops
+
+    prevs = np.concatenate([np.roll(loop, 1, axis=0) for loop in loops])
+    nexts = np.concatenate([np.roll(loop, -1, axis=0) for loop in loops])
+    to_prev = np.arctan2(*(prevs - points).T[::-1])
+    to_next = np.arctan2(*(nexts - points).T[::-1])
+
+    moved = points.copy()
+    for group in np.nonzero(counts > 1)[0].tolist():
+        copies = np.nonzero(inverse == group)[0]
+        rays = np.concatenate((to_prev[copies], to_next[copies]))
+        for k, copy in enumerate(copies.tolist()):
+            start, end = to_next[copy], to_prev[copy]
+            span = (end - start) % (2 * np.pi)
+            others = np.delete(rays, (k, k + len(copies)))
+            offset = (others - start) % (2 * np.pi)
+            blocked = np.any((offset > 1e-9) & (offset < span - 1e-9))
+            if blocked:
+                # the other side of this corner is the free one
+                start, span = end, 2 * np.pi - span
+            angle = start + span / 2
+            moved[copy] += epsilon * np.array((np.cos(angle), np.sin(angle)))
+
+    offsets = np.cumsum([0] + [len(loop) for loop in loops])
+    return [moved[offsets[i] : offsets[i + 1]] for i in range(len(loops))]
+
+
+def bridge_holes(points: np.ndarray, ring: List[int], holes: List[List[int]]):
+    """Cut each hole into the outer ring along a visible bridge edge."""
+    holes = sorted(holes, key=lambda hole: -points[hole, 0].max())
+    # edges of the holes not bridged yet, the ring edges are rebuilt per hole
+    hole_edges = [(points[hole], points[np.roll(hole, -1)]) for hole in holes]
+    for h, hole in enumerate(holes):
+        start = int(np.argmax(points[hole, 0]))
+        hole = hole[start:] + hole[:start]
+        m = points[hole[0]]
+
+        ring_pts = points[ring]
+        seg_a = np.concatenate([ring_pts] + [a for a, _ in hole_edges[h:]])
+        seg_b = np.concatenate(
+            [np.roll(ring_pts, -1, axis=0)] + [b for _, b in hole_edges[h:]]
+        )
+        order = np.argsort(np.hypot(*(ring_pts - m).T), kind="stable")
+
+        target = int(order[0])
+        for k in order.tolist():
+            p = ring_pts[k]
+            a = ring_pts[k - 1]
+            c = ring_pts[(k + 1) % len(ring)]
+            if in_sector(a, p, c, m - p) and bridge_is_clear(m, p, seg_a, seg_b, seg_a):
+                target = k
+                break
+        ring = ring[: target + 1] + hole + [hole[0], ring[target]] + ring[target + 1 :]
+    return ring
+
+
+def clip_ears(pts: np.ndarray) -> List[Tuple[int, int, int]]:
+    """Ear clipping for a positively oriented, strictly simple ring."""
+    count = len(pts)
+    prev = np.roll(np.arange(count), 1)
+    nxt = np.roll(np.arange(count), -1)
+    active = np.ones(count, dtype=bool)
+    triangles = []
+
+    def turn_at(i):
+        return cross(pts[prev[i]], pts[i], pts[nxt[i]])
+
+    def remove(i):
+        p, n = prev[i], nxt[i]
+        nxt[p], prev[n] = n, p
+        active[i] = False
+
+    def is_ear(a, b, c):
+        # only reflex or flat vertices can block an ear, like earcut does
+        others = np.nonzero(active)[0]
+        others = others[(others != a) & (others != b) & (others != c)]
+        candidates = pts[others]
+        tri = pts[[a, b, c]]
+        # copies nudged in opposite directions keep a pixel corner exactly on
+        # the line between them, rounding must not push it outside the ear
+        inside = (
+            (cross(tri[0], tri[1], candidates) >= -1e-9)
+            & (cross(tri[1], tri[2], candidates) >= -1e-9)
+            & (cross(tri[2], tri[0], candidates) >= -1e-9)
+        )
+        if not inside.any():
+            return True
+        others = others[inside]
+        return not np.any(cross(pts[prev[others]], pts[others], pts[nxt[others]]) <= 0)
+
+    remaining = count
+    i = 0
+    stall = 0
+    while remaining > 3:
+        a, c = prev[i], nxt[i]
+        turn = turn_at(i)
+        if turn == 0:
+            # duplicate, collinear point or zero-width spike, nothing to fill
+            remove(i)
+            remaining -= 1
+            i, stall = a, 0
+        elif turn > 0 and (stall > remaining or is_ear(a, i, c)):
+            triangles.append((a, i, c))
+            remove(i)
+            remaining -= 1
+            i, stall = a, 0
+        elif stall > 2 * remaining:
+            # self intersecting leftovers, drop the vertex to guarantee progress
+            remove(i)
+            remaining -= 1
+            i, stall = c, 0
+        else:
+            i = c
+            stall += 1
+    if remaining == 3 and turn_at(i) > 0:
+        triangles.append((prev[i], i, nxt[i]))
+    return triangles
+
+
+def triangulate_polygon(outer: np.ndarray, holes: List[np.ndarray]):
+    """Triangulate one outer loop with its holes.
+
+    Returns ``(points, triangles)``: welded (N, 2) points and (M, 3) indices
+    wound with positive signed area, like the outer loop.
+    """
+    loops = [np.asarray(outer, dtype=np.float64)] + [
+        np.asarray(hole, dtype=np.float64) for hole in holes
+    ]
+    points = np.concatenate(loops)
+    offsets = np.cumsum([0] + [len(loop) for loop in loops])
+    rings = [list(range(offsets[i], offsets[i + 1])) for i in range(len(loops))]
+
+    work = np.concatenate(separate_copies(loops))
+    ring = np.asarray(bridge_holes(work, rings[0], rings[1:]))
+    # the bridge copies sit between copies only epsilon apart already, a
+    # full step would carry them across their neighbours' edges
+    ring_pts = separate_copies([work[ring]], epsilon=1e-5)[0]
+    triangles = np.asarray(clip_ears(ring_pts), dtype=np.int64).reshape(-1, 3)
+
+    welded, inverse = np.unique(points, axis=0, return_inverse=True)
+    triangles = inverse.reshape(-1)[ring[triangles]]
+    # slivers squeezed between two welded copies collapse to nothing
+    corners = welded[triangles]
+    triangles = triangles[cross(corners[:, 0], corners[:, 1], corners[:, 2]) > 0]
+    used, triangles = np.unique(triangles, return_inverse=True)
+    return welded[used], triangles.reshape(-1, 3)
+
+
+def triangulate_contours(contours_px: List[np.ndarray]):
+    """Triangulate every island of a traced sprite into one vertex/index set."""
+    all_points = []
+    all_triangles = []
+    offset = 0
+    for outer, holes in group_contours(contours_px):
+        points, triangles = triangulate_polygon(outer, holes)
+        all_points.append(points)
+        all_triangles.append(triangles + offset)
+        offset += len(points)
+    if not all_points:
+        return np.zeros((0, 2)), np.zeros((0, 3), dtype=np.int64)
+    return np.concatenate(all_points), np.concatenate(all_triangles)
@@ -0,0 +1,77 @@
+"""Fixed width skinning data: the K strongest bones of every vertex."""
+
+from typing import List
+
+import numpy as np
+
+
+def group_bone_map(group_names: List[str], bone_names: List[str]) -> np.ndarray:
+    """Bone index of every vertex group, -1 for groups that are not bones."""
+    bone_index = {bone: i for i, bone in enumerate(bone_names)}
+    return np.asarray([bone_index.get(name, -1) for name in group_names], np.int64)
+
+
+def bone_index_dtype(bone_count: int):
+    return np.uint8 if bone_count <= 0x100 else np.uint16
+
+
+def pack_weights(
+    vertex_count: int,
+    weights: np.ndarray,
+    group_bones: np.ndarray,
+    bone_count: int,
+    max_influences=4,
+    threshold=1e-3,
+) -> dict:
+    """Top ``max_influences`` bones per vertex with weights summing to one.
+
+    ``weights`` holds one ``(vertex, group, weight)`` row per assignment.
+    Assignments to groups that are not bones or below ``threshold`` are
+    dropped, the rest is ranked by weight within its vertex. Returns the
+    ``(N, K)`` ``indices`` and ``weights`` plus the vertices that had more
+    influences than fit in ``truncated``. Unweighted vertices keep all zero
+    rows.
+    """
+    weights = np.asarray(weights, dtype=np.float64).reshape(-1, 3)
+    verts = weights[:, 0].astype(np.int64)
+    groups = weights[:, 1].astype(np.int64)
+    values = weights[:, 2]
+    bones = np.full(len(groups), -1, dtype=np.int64)
+    known = (groups >= 0) & (groups < len(group_bones))
+    bones[known] = group_bones[groups[known]]
+    keep = (bones >= 0) & (values >= threshold) & (verts < vertex_count)
+    verts, bones, values = verts[keep], bones[keep], values[keep]
+
+    # strongest first within each vertex
+    order = np.lexsort((-values, verts))
+    verts, bones, values = verts[order], bones[order], values[order]
+    counts = np.bincount(verts, minlength=vertex_count)
+    starts = np.zeros(vertex_count + 1, dtype=np.int64)
+    np.cumsum(counts, out=starts[1:])
+    rank = np.arange(len(verts)) - starts[verts]
+    fits = rank < max_influences
+
+    packed_bones = np.zeros((vertex_count, max_influences), dtype=np.int64)
+    packed_weights = np.zeros((vertex_count, max_influences), dtype=np.float64)
+    packed_bones[verts[fits], rank[fits]] = bones[fits]
+    packed_weights[verts[fits], rank[fits]] = values[fits]
+    totals = packed_weights.sum(axis=1, keepdims=True)
+    np.divide(packed_weights, totals, out=packed_weights, where=totals > 0)
+    return {
+        "indices": packed_bones.astype(bone_index_dtype(bone_count)),
+        "weights": packed_weights.astype(np.float32),
+        "truncated": np.flatnonzero(counts > max_influences),
+    }
+
+
+def nearest_rows(points: np.ndarray, targets: np.ndarray, chunk=1024) -> np.ndarray:
+    """Index of the closest row of ``targets`` for every row of ``points``."""
+    points = np.asarray(points, dtype=np.float64)
+    targets = np.asarray(targets, dtype=np.float64)
+    nearest = np.empty(len(points), dtype=np.int64)
+    # chunked so a dense mesh never needs the full distance matrix
+    for start in range(0, len(points), chunk):
+        block = points[start : start + chunk]
+        distances = ((block[:, None, :] - targets[None, :, :]) ** 2).sum(axis=2)
+        nearest[start : start + chunk] = distances.argmin(axis=1)
+    return nearest
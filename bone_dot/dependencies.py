@@ -0,0 +1,125 @@
+"""Third party modules of the addon, installed without blocking Blender.
+
+Registering only reads the marker left by the last successful install, or
+looks the modules up without importing them. When they are missing the
+bundled wheels are installed by pip in a background process, and the
+operators stay disabled until it is done.
+"""
+
+import importlib
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import threading
+
+REQUIRED = ("numpy", "PIL")
+ADDON_DIR = os.path.dirname(__file__)
+LIBS_DIR = os.path.join(ADDON_DIR, "lib")
+MARKER = os.path.join(ADDON_DIR, ".dependencies.json")
+
+READY = "READY"
+INSTALLING = "INSTALLING"
+FAILED = "FAILED"
+
+
+class Installer:
+    def __init__(self):
+        self.state = None
+        self.error = ""
+        self.thread = None
+
+    def wheels(self) -> list:
+        try:
+            names = os.listdir(LIBS_DIR)
+        except OSError:
+            return []
+        return sorted(os.path.join(LIBS_DIR, f) for f in names if f.endswith(".whl"))
+
+    def stamp(self) -> dict:
+        # a new Blender or new bundled wheels need another install
+        return {
+            "python": sys.executable,
+            "version": list(sys.version_info[:3]),
+            "wheels": [os.path.basename(wheel) for wheel in self.wheels()],
+        }
+
+    def marker_valid(self) -> bool:
+        try:
+            with open(MARKER, "r", encoding="utf-8") as f:
+                return json.load(f) == self.stamp()
+        except (OSError, ValueError):
+            return False
+
+    def write_marker(self):
+        try:
+            with open(MARKER, "w", encoding="utf-8") as f:
+                json.dump(self.stamp(), f)
+        except OSError:
+            pass
+
+    def check(self):
+        """Find out whether the modules are there, installing them if not."""
+        if self.marker_valid():
+            self.state = READY
+        elif all(importlib.util.find_spec(name) for name in REQUIRED):
+            self.write_marker()
+            self.state = READY
+        elif self.state != INSTALLING:
+            self.start()
+
+    def start(self):
+        self.state = INSTALLING
+        self.error = ""
+        self.thread = threading.Thread(target=self.install, daemon=True)
+        self.thread.start()
+
+    def install(self):
+        commands = [[sys.executable, "-m", "ensurepip"]]
+        commands += [
+            [sys.executable, "-m", "pip", "install", "--upgrade", wheel]
+            for wheel in self.wheels()
+        ]
+        try:
+            for command in commands:
+                subprocess.run(command, check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError as e:
+            lines = (e.stderr or e.stdout or "").strip().splitlines()
+            self.error = lines[-1] if lines else f"exit status {e.returncode}"
+            self.state = FAILED
+            return
+        except OSError as e:
+            self.error = str(e)
+            self.state = FAILED
+            return
+        # the new site-packages entries are unknown to the import system yet
+        importlib.invalidate_caches()
+        if all(importlib.util.find_spec(name) for name in REQUIRED):
+            self.write_marker()
+            self.state = READY
+        else:
+            self.error = "no wheel provides " + ", ".join(REQUIRED)
+            self.state = FAILED
+
+    def message(self) -> str:
+        if self.state == INSTALLING:
+            return "Installing NumPy and Pillow, BoneDot is ready in a moment"
+        if self.state == FAILED:
+            return f"Installing NumPy and Pillow failed: {self.error}"
+        return ""
+
+
+installer = Installer()
+
+
+def ready() -> bool:
+    return installer.state == READY
+
+
+def poll_ready(cls) -> bool:
+    """Operator poll that explains why it is greyed out while installing."""
+    if installer.state == READY:
+        return True
+    cls.poll_message_set(installer.message())
+    return False
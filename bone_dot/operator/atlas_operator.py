@@ -0,0 +1,193 @@
+import os
+
+import bpy
+from bpy.props import BoolProperty, EnumProperty, IntProperty, StringProperty
+from bpy.types import Context, Object
+from bpy_extras.io_utils import ExportHelper
+
+from bone_dot.dependencies import poll_ready
+from bone_dot.operator.image_index import image_index
+
+
+class Bonedot_OT_BuildAtlas(bpy.types.Operator, ExportHelper):
+    bl_idname = "bonedot.build_atlas"
+    bl_label = "Build Atlas"
+    bl_description = (
+        "Pack the sprite textures of the active armature or collection into "
+        "shared atlas images and remap the UVs"
+    )
+    bl_options = {"REGISTER", "UNDO"}
+
+    filename_ext = ".png"
+    filter_glob: StringProperty(default="*.png", options={"HIDDEN"})
+
+    max_size: EnumProperty(
+        name="Max Size",
+        description="Largest atlas page, more pages are added when it is full",
+        items=[
+            ("1024", "1024", ""),
+            ("2048", "2048", ""),
+            ("4096", "4096", ""),
+            ("8192", "8192", ""),
+        ],
+        default="4096",
+    )
+    padding: IntProperty(
+        name="Padding",
+        description="Empty pixels between two packed sprites",
+        default=2,
+        min=0,
+        max=64,
+    )
+    trim: BoolProperty(
+        name="Trim",
+        description="Leave out transparent borders no UV reaches into",
+        default=True,
+    )
+
+    @classmethod
+    def poll(cls, context: Context):
+        return poll_ready(cls)
+
+    def sprite_objects(self, context: Context) -> list:
+        obj = context.object
+        if obj and obj.type == "ARMATURE":
+            objects = obj.children_recursive
+        else:
+            objects = context.collection.all_objects
+        return [
+            obj for obj in objects if obj.type == "MESH" and obj.data.uv_layers.active
+        ]
+
+    def texture_nodes(self, obj: Object) -> list:
+        nodes = []
+        for mat in obj.data.materials:
+            if mat and mat.use_nodes:
+                nodes += [
+                    node
+                    for node in mat.node_tree.nodes
+                    if node.type == "TEX_IMAGE" and node.image
+                ]
+        return nodes
+
+    def read_uvs(self, mesh):
+        import numpy as np
+
+        uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+        mesh.uv_layers.active.data.foreach_get("uv", uvs)
+        return uvs.reshape(-1, 2)
+
+    def collect_sprites(self, context: Context) -> list:
+        """One entry per source image with the meshes and nodes using it."""
+        import numpy as np
+        from PIL import Image
+
+        from bone_dot.core.atlas import union_bbox, uv_bbox
+        from bone_dot.core.image import alpha_bbox
+
+        sprites = {}
+        packed = []
+        for obj in self.sprite_objects(context):
+            nodes = self.texture_nodes(obj)
+            if not nodes:
+                continue
+            if "bonedot_atlas_region" in obj:
+                # its image is a page already, a second atlas would lose the source
+                packed.append(obj.name)
+                continue
+            image = nodes[0].image
+            sprite = sprites.setdefault(
+                image.name,
+                {"image": image, "meshes": {}, "objects": [], "nodes": set()},
+            )
+            sprite["meshes"][obj.data.name] = obj.data
+            sprite["objects"].append(obj)
+            sprite["nodes"].update(nodes)
+        if packed:
+            self.report(
+                {"WARNING"}, f"Already in an atlas, skipped: {', '.join(packed)}"
+            )
+
+        collected = []
+        for sprite in sprites.values():
+            image = sprite["image"]
+            filepath = bpy.path.abspath(image.filepath, library=image.library)
+            if image.packed_file or not os.path.exists(filepath):
+                self.report({"WARNING"}, f"{image.name} has no image file, skipped")
+                continue
+            with Image.open(filepath) as pil_img:
+                pixels = np.asarray(pil_img.convert("RGBA"))
+            size = pixels.shape[1], pixels.shape[0]
+            region = (0, 0, *size)
+            if self.trim:
+                region = union_bbox(
+                    alpha_bbox(pixels[..., 3]),
+                    *(
+                        uv_bbox(self.read_uvs(mesh), size)
+                        for mesh in sprite["meshes"].values()
+                    ),
+                )
+            if region is None or region[2] <= region[0] or region[3] <= region[1]:
+                continue
+            sprite.update(pixels=pixels, size=size, region=region, filepath=filepath)
+            collected.append(sprite)
+        return collected
+
+    def page_paths(self, count: int) -> list:
+        if count == 1:
+            return [self.filepath]
+        root, ext = os.path.splitext(self.filepath)
+        return [f"{root}_{i}{ext}" for i in range(count)]
+
+    def execute(self, context: Context):
+        from PIL import Image
+
+        from bone_dot.core.atlas import compose_pages, pack_rects, remap_uvs
+
+        sprites = self.collect_sprites(context)
+        if not sprites:
+            self.report({"WARNING"}, "No sprite textures to pack")
+            return {"CANCELLED"}
+
+        regions = [sprite["region"] for sprite in sprites]
+        sizes = [(x1 - x0, y1 - y0) for x0, y0, x1, y1 in regions]
+        try:
+            placements, page_sizes = pack_rects(sizes, int(self.max_size), self.padding)
+        except ValueError as e:
+            self.report({"ERROR"}, str(e))
+            return {"CANCELLED"}
+        pages = compose_pages(
+            [sprite["pixels"] for sprite in sprites], regions, placements, page_sizes
+        )
+
+        page_images = []
+        for page, path in zip(pages, self.page_paths(len(pages))):
+            Image.fromarray(page, "RGBA").save(path)
+            page_images.append(image_index.load(path))
+
+        for sprite, placement in zip(sprites, placements):
+            page_size = page_sizes[placement.page]
+            for mesh in sprite["meshes"].values():
+                uvs = remap_uvs(
+                    self.read_uvs(mesh),
+                    sprite["size"],
+                    sprite["region"],
+                    placement,
+                    page_size,
+                )
+                mesh.uv_layers.active.data.foreach_set("uv", uvs.reshape(-1))
+                mesh.update()
+            for node in sprite["nodes"]:
+                node.image = page_images[placement.page]
+            # UV Sync and Cutoff Mesh map the page UVs back through these
+            for obj in sprite["objects"]:
+                obj["bonedot_source_image"] = sprite["filepath"]
+                obj["bonedot_source_size"] = list(sprite["size"])
+                obj["bonedot_atlas_region"] = list(sprite["region"])
+                obj["bonedot_atlas_offset"] = [int(placement.x), int(placement.y)]
+
+        self.report(
+            {"INFO"},
+            f"{len(sprites)} textures packed into {len(pages)} atlas page(s)",
+        )
+        return {"FINISHED"}
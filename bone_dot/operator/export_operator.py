@@ -1,58 +1,308 @@
 from typing import List
 import os
+import time
 import bpy
 from bpy.types import Armature, Context, Image, Object
+from bpy_extras.io_utils import ExportHelper
 from mathutils import Vector
 from math import atan2
-from math import isclose
+from itertools import chain
 
+from bone_dot.core.profile import profiler
+from bone_dot.dependencies import poll_ready
 
-class Bonedot_OT_ExportAnimation(bpy.types.Operator):
+# the NumPy backed export code is imported by the methods using it, so
+# registering the addon does not load it
+
+
+class Bonedot_OT_ExportAnimation(bpy.types.Operator, ExportHelper):
     bl_idname = "bonedot.export_animation"
     bl_label = "Export Animation"
     bl_description = "Export Animation"
     bl_options = {"REGISTER"}
 
-    filepath: bpy.props.StringProperty(
-        name="File Path",
-        description="保存为.bdsket文件",
-        subtype="FILE_PATH",
-        options={"SKIP_SAVE"},
-        filter_glob="*.bdsket",
+    # 保存为.bdsket文件
+    filename_ext = ".bdsket"
+    filter_glob: bpy.props.StringProperty(default="*.bdsket", options={"HIDDEN"})
+    key_reduction: bpy.props.EnumProperty(
+        name="Key Reduction",
+        items=[
+            ("EXACT", "Exact", "Only drop keys equal to the previous one"),
+            ("LINEAR", "Linear", "Drop keys linear interpolation reproduces"),
+            ("CUBIC", "Cubic", "Drop keys cubic interpolation reproduces"),
+        ],
+        default="EXACT",
+    )
+    location_tolerance: bpy.props.FloatProperty(
+        name="Location Tolerance",
+        description="Max location error of a dropped key",
+        default=0.0005,
+        min=0.0,
+        precision=5,
+    )
+    rotation_tolerance: bpy.props.FloatProperty(
+        name="Rotation Tolerance",
+        description="Max rotation error of a dropped key",
+        default=0.001,
+        min=0.0,
+        subtype="ANGLE",
+    )
+    max_influences: bpy.props.IntProperty(
+        name="Bones per Vertex",
+        description="Strongest bones kept per vertex, the rest is dropped",
+        default=4,
+        min=1,
+        max=8,
+    )
+    weight_threshold: bpy.props.FloatProperty(
+        name="Weight Threshold",
+        description="Weights below this do not count as an influence",
+        default=0.001,
+        min=0.0,
+        max=1.0,
+        precision=4,
     )
+    optimize_cache: bpy.props.BoolProperty(
+        name="Optimize Vertex Cache",
+        description="Reorder triangles and vertices so the GPU reuses more "
+        "transformed vertices",
+        default=True,
+    )
+    export_lods: bpy.props.BoolProperty(
+        name="Export LODs",
+        description="Write the LOD meshes stored by Cutoff Mesh after each mesh",
+        default=True,
+    )
+    compression: bpy.props.EnumProperty(
+        name="Compression",
+        items=[
+            ("NONE", "None", "Store sections as is, readers map them directly"),
+            ("ZLIB", "Zlib", "Fast compression of every section"),
+            ("LZMA", "LZMA", "Smallest files, slower to write and read"),
+        ],
+        default="NONE",
+    )
+    incremental: bpy.props.BoolProperty(
+        name="Incremental",
+        description="Copy sections whose content did not change from the last export",
+        default=True,
+    )
+
+    @classmethod
+    def poll(cls, context: Context):
+        return poll_ready(cls)
 
     def execute(self, context: Context):
-        if not context.selected_objects:
-            self.report({"ERROR", "Please select Armature"})
-            return {"CANCELLED"}
+        from bone_dot.core.bdsket import CODECS
+        from bone_dot.core.incremental import IncrementalExport
+
+        start = time.perf_counter()
+        self.truncated = {}
         armatures = []
         for obj in context.selected_objects:
             if obj.type != "ARMATURE":
-                self.report({"ERROR", "Please select Armature"})
+                self.report({"WARNING"}, f"{obj.name} is not an Armature")
                 continue
-            meshes = [child for child in obj.children if child.type == "MESH"]
-            images = self.find_mesh_texture_images(context, meshes)
-            textures = [
-                {
-                    "texture": f"textures/{os.path.basename(image.filepath)}",
-                    "size": image.size,
-                }
-                for image in images
-            ]
-            meshes = [self.extract_mesh_data(mesh) for mesh in meshes]
-            bones = self.extract_skeleton_data(obj)
-            animation = self.extract_animation(obj)
-            armatures.append(
-                {
-                    "textures": textures,
-                    "meshes": meshes,
-                    "bones": bones,
-                    "animations": animation,
-                }
+            armatures.append(obj)
+        if not armatures:
+            self.report({"ERROR"}, "Please select Armature")
+            return {"CANCELLED"}
+
+        with (
+            profiler.span("export"),
+            IncrementalExport(
+                self.filepath, CODECS[self.compression], self.incremental
+            ) as export,
+        ):
+            for obj in armatures:
+                with profiler.span("armature", name=obj.name):
+                    self.write_armature(export, context, obj)
+        profiler.count("sections reused", len(export.reused))
+        profiler.count("sections rebuilt", len(export.rebuilt))
+        rebuilt = ", ".join(export.rebuilt[:10])
+        if len(export.rebuilt) > 10:
+            rebuilt += ", ..."
+        self.report(
+            {"INFO"},
+            f"exported {len(armatures)} armatures in "
+            f"{time.perf_counter() - start:.2f}s, {len(export.reused)} sections "
+            f"reused, {len(export.rebuilt)} rebuilt: {rebuilt or 'none'}",
+        )
+        if self.truncated:
+            counts = ", ".join(f"{k} ({v})" for k, v in self.truncated.items())
+            self.report(
+                {"WARNING"},
+                f"vertices with more than {self.max_influences} bones lost their "
+                f"weakest weights: {counts}",
             )
-        print(armatures)
         return {"FINISHED"}
 
+    def write_armature(self, export, context: Context, obj: Object):
+        """Extract and write one section at a time, nothing is kept after.
+
+        Sections whose content hash matches the last export are copied from
+        the previous file instead of being extracted again.
+        """
+        from bone_dot.core.bdsket import (
+            KIND_ANIMATION,
+            KIND_MESH,
+            KIND_SKELETON,
+            KIND_TEXTURE,
+            write_animation,
+            write_mesh,
+            write_skeleton,
+            write_texture,
+        )
+        from bone_dot.core.incremental import content_hash
+
+        writer = export.writer
+        name = obj.name
+        with profiler.span("hash skeleton"):
+            rest = self.rest_pose_hash(obj)
+        if not export.reuse(KIND_SKELETON, name, rest):
+            with profiler.span("extract skeleton"):
+                bones = self.extract_skeleton_data(obj)
+            with profiler.span("serialize"):
+                write_skeleton(writer, name, bones)
+            export.record(KIND_SKELETON, name, rest)
+        bone_names = [bone.name for bone in obj.data.bones]
+
+        meshes = [child for child in obj.children if child.type == "MESH"]
+        written = set()
+        for image in self.find_mesh_texture_images(context, meshes):
+            texture = {
+                "texture": f"textures/{os.path.basename(image.filepath)}",
+                "size": image.size,
+            }
+            # meshes sharing an image list it once each
+            if texture["texture"] in written:
+                continue
+            written.add(texture["texture"])
+            section = f"{name}/{texture['texture']}"
+            digest = content_hash(
+                self.compression, texture["texture"], tuple(texture["size"])
+            )
+            if not export.reuse(KIND_TEXTURE, section, digest):
+                write_texture(writer, section, texture)
+                export.record(KIND_TEXTURE, section, digest)
+        for mesh_obj in meshes:
+            section = f"{name}/{mesh_obj.name}"
+            with profiler.span("hash mesh"):
+                digest = self.mesh_hash(mesh_obj, bone_names)
+            # the LOD levels follow their mesh, one section each
+            digests = {section: digest}
+            for level in range(1, self.lod_count(mesh_obj) + 1):
+                lod_section = f"{section}/lod{level}"
+                digests[lod_section] = content_hash(digest, lod_section)
+            if not export.reuse_all(KIND_MESH, digests):
+                with profiler.span("extract mesh"):
+                    mesh = self.extract_mesh_data(mesh_obj, bone_names)
+                lod_meshes = mesh.pop("lod_meshes", [])
+                mesh["lods"] = [
+                    {
+                        "section": f"{section}/lod{level}",
+                        "screen_size": lod["screen_size"],
+                        "tolerance": lod["tolerance"],
+                    }
+                    for level, lod in enumerate(lod_meshes, 1)
+                ]
+                profiler.count("vertices emitted", len(mesh["vertices"]))
+                if len(mesh["truncated"]):
+                    self.truncated[section] = len(mesh["truncated"])
+                with profiler.span("serialize"):
+                    write_mesh(writer, section, mesh)
+                    for info, lod in zip(mesh["lods"], lod_meshes):
+                        write_mesh(writer, info["section"], lod)
+                export.record(KIND_MESH, section, digest)
+                for info in mesh["lods"]:
+                    export.record(KIND_MESH, info["section"], digests[info["section"]])
+        for action in self.armature_actions(obj):
+            section = f"{name}/{action.name}"
+            with profiler.span("hash action"):
+                digest = self.action_hash(action, rest)
+            if not export.reuse(KIND_ANIMATION, section, digest):
+                with profiler.span("bake action", name=action.name):
+                    animation = self.extract_action(obj, action)
+                with profiler.span("serialize"):
+                    write_animation(writer, section, animation)
+                export.record(KIND_ANIMATION, section, digest)
+
+    def rest_pose_hash(self, obj: Object) -> str:
+        import numpy as np
+
+        from bone_dot.core.incremental import content_hash
+
+        bones = obj.data.bones
+        matrices = np.empty(len(bones) * 16, dtype=np.float32)
+        bones.foreach_get("matrix_local", matrices)
+        lengths = np.empty(len(bones), dtype=np.float32)
+        bones.foreach_get("length", lengths)
+        parents = [
+            (bone.name, bone.parent.name if bone.parent else None) for bone in bones
+        ]
+        return content_hash(
+            self.compression, np.array(obj.matrix_world), matrices, lengths, parents
+        )
+
+    def mesh_hash(self, mesh_obj: Object, bone_names) -> str:
+        """Hash of everything extract_mesh_data reads, without building its lists."""
+        import numpy as np
+
+        from bone_dot.core.incremental import content_hash
+
+        eval_obj = mesh_obj.evaluated_get(bpy.context.evaluated_depsgraph_get())
+        mesh = eval_obj.to_mesh()
+        try:
+            arrays = self.read_mesh_arrays(mesh)
+        finally:
+            eval_obj.to_mesh_clear()
+        lods = self.stored_lods(mesh_obj) if self.export_lods else []
+        return content_hash(
+            self.compression,
+            *arrays.values(),
+            np.array(mesh_obj.matrix_world),
+            [group.name for group in mesh_obj.vertex_groups],
+            bone_names,
+            self.max_influences,
+            self.weight_threshold,
+            self.optimize_cache,
+            self.trim_data(mesh_obj),
+            self.export_lods,
+            *(value for lod in lods for value in lod.values()),
+        )
+
+    def action_hash(self, action, rest: str) -> str:
+        """Hash of the keyframes of ``action`` and everything its bake depends on.
+
+        Constraints and drivers are not part of it; turn Incremental off to
+        force a full export after changing those.
+        """
+        import numpy as np
+
+        from bone_dot.core.incremental import content_hash
+
+        parts = [
+            rest,
+            tuple(action.frame_range),
+            self.key_reduction,
+            self.location_tolerance,
+            self.rotation_tolerance,
+        ]
+        for fcurve in action.fcurves:
+            points = fcurve.keyframe_points
+            keys = np.empty((3, len(points) * 2), dtype=np.float32)
+            points.foreach_get("co", keys[0])
+            points.foreach_get("handle_left", keys[1])
+            points.foreach_get("handle_right", keys[2])
+            parts += [
+                fcurve.data_path,
+                fcurve.array_index,
+                fcurve.mute,
+                keys,
+                [point.interpolation for point in points],
+            ]
+        return content_hash(*parts)
+
     def find_mesh_texture_images(
         self, context: Context, meshes: List[Object]
     ) -> List[Image]:
@@ -65,40 +315,160 @@ class Bonedot_OT_ExportAnimation(bpy.types.Operator):
                             images.append(node.image)
         return images
 
-    def extract_mesh_data(self, mesh_obj: Object):
-        mesh = mesh_obj.evaluated_get(bpy.context.evaluated_depsgraph_get()).to_mesh()
-        world_matrix = mesh_obj.matrix_world
-        vertices = [
-            [round((world_matrix @ v.co).x, 6), round((world_matrix @ v.co).y, 6)]
-            for v in mesh.vertices
-        ]
-        uv_layer = mesh.uv_layers.active.data if mesh.uv_layers.active else None
-        uvs = [[0.0, 0.0] for _ in range(len(mesh.vertices))]
-        if uv_layer:
-            for loop in mesh.loops:
-                uv = uv_layer[loop.index].uv
-                vert_index = loop.vertex_index
-                uvs[vert_index] = [round(uv.x, 6), round(uv.y, 6)]
-        triangles = []
-        for poly in mesh.polygons:
-            if len(poly.vertices) == 3:
-                triangles.append(list(poly.vertices))
-            elif len(poly.vertices) > 3:
-                for i in range(1, len(poly.vertices) - 1):
-                    triangles.append(
-                        [poly.vertices[0], poly.vertices[i], poly.vertices[i + 1]]
-                    )
+    def extract_mesh_data(self, mesh_obj: Object, bone_names):
+        """Vertex and index buffers of the evaluated mesh in world space.
 
+        Vertices are split wherever their loops disagree on the UV, so seams
+        survive, and the triangles are ordered for the vertex cache.
+        """
+        from bone_dot.core.buffers import compile_mesh
+        from bone_dot.core.mesh import world_positions
+        from bone_dot.core.weights import group_bone_map, pack_weights
+
+        eval_obj = mesh_obj.evaluated_get(bpy.context.evaluated_depsgraph_get())
+        mesh = eval_obj.to_mesh()
+        try:
+            arrays = self.read_mesh_arrays(mesh)
+        finally:
+            eval_obj.to_mesh_clear()
+
+        world_matrix = mesh_obj.matrix_world
+        vertices = world_positions(arrays["co"], world_matrix)[:, :2].round(6)
         origin_world = world_matrix @ Vector((0, 0, 0))
         z_hint = round(origin_world.z, 6)
-        return {
+        skin = pack_weights(
+            len(vertices),
+            arrays["weights"],
+            group_bone_map([vg.name for vg in mesh_obj.vertex_groups], bone_names),
+            len(bone_names),
+            self.max_influences,
+            self.weight_threshold,
+        )
+        with profiler.span("compile buffers"):
+            buffers, triangles = compile_mesh(
+                arrays["triangle_loops"],
+                arrays["loop_vertices"],
+                {
+                    "vertices": vertices,
+                    "bone_indices": skin["indices"],
+                    "bone_weights": skin["weights"],
+                },
+                {"uvs": arrays["loop_uvs"].round(6)},
+                optimize=self.optimize_cache,
+            )
+        mesh_data = {
             "name": mesh_obj.name.split(".")[0],
-            "vertices": vertices,
-            "uvs": uvs,
+            "object": mesh_obj.name,
             "triangles": triangles,
             "texture": mesh_obj.name,
             "z_hint": z_hint,
-            "weights": self.extract_weights_dict_per_mesh(mesh_obj),
+            "truncated": skin["truncated"],
+            **buffers,
+        }
+        trim = self.trim_data(mesh_obj)
+        if trim:
+            mesh_data["trim"] = trim
+        lods = self.stored_lods(mesh_obj) if self.export_lods else []
+        if lods and len(arrays["co"]):
+            with profiler.span("compile lods", levels=len(lods)):
+                mesh_data["lod_meshes"] = [
+                    self.lod_mesh_data(mesh_data, lod, arrays["co"], skin, world_matrix)
+                    for lod in lods
+                ]
+        return mesh_data
+
+    def lod_mesh_data(self, mesh_data, lod, source_co, skin, world_matrix):
+        """Buffers of one stored LOD level, skinned like the full mesh.
+
+        The levels are not vertex groups of their own, every LOD vertex
+        takes the bone weights of the nearest full mesh vertex.
+        """
+        import numpy as np
+
+        from bone_dot.core.buffers import compile_mesh
+        from bone_dot.core.mesh import world_positions
+        from bone_dot.core.weights import nearest_rows
+
+        co = np.column_stack((lod["co"], np.zeros(len(lod["co"]))))
+        nearest = nearest_rows(lod["co"], source_co[:, :2])
+        buffers, triangles = compile_mesh(
+            lod["triangles"],
+            np.arange(len(co)),
+            {
+                "vertices": world_positions(co, world_matrix)[:, :2].round(6),
+                "bone_indices": skin["indices"][nearest],
+                "bone_weights": skin["weights"][nearest],
+                "uvs": lod["uvs"].round(6),
+            },
+            {},
+            optimize=self.optimize_cache,
+        )
+        return {
+            "name": mesh_data["name"],
+            "texture": mesh_data["texture"],
+            "z_hint": mesh_data["z_hint"],
+            "screen_size": lod["screen_size"],
+            "tolerance": lod["tolerance"],
+            "triangles": triangles,
+            **buffers,
+        }
+
+    def lod_count(self, mesh_obj: Object) -> int:
+        if not self.export_lods:
+            return 0
+        return len(mesh_obj.get("bonedot_lods", ()))
+
+    def stored_lods(self, mesh_obj: Object):
+        """The LOD levels Cutoff Mesh kept on the object, as arrays."""
+        import numpy as np
+
+        return [
+            {
+                "tolerance": float(lod["tolerance"]),
+                "screen_size": float(lod["screen_size"]),
+                "co": np.asarray(lod["co"], dtype=np.float64).reshape(-1, 2),
+                "uvs": np.asarray(lod["uvs"], dtype=np.float64).reshape(-1, 2),
+                "triangles": np.asarray(lod["triangles"], dtype=np.int64).reshape(
+                    -1, 3
+                ),
+            }
+            for lod in mesh_obj.get("bonedot_lods", ())
+        ]
+
+    def trim_data(self, mesh_obj: Object):
+        if "bonedot_trim" not in mesh_obj:
+            return None
+        return {
+            "rect": list(mesh_obj["bonedot_trim"]),
+            "source_size": list(mesh_obj["bonedot_source_size"]),
+            "cropped_pixels": mesh_obj["bonedot_cropped_pixels"],
+        }
+
+    def read_mesh_arrays(self, mesh):
+        """Pull positions, loop UVs, Blender's own triangulation and weights.
+
+        Everything comes from the same evaluated mesh, so modifiers that add
+        or remove vertices keep the weights in step with the positions.
+        """
+        import numpy as np
+
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        loop_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", loop_vertices)
+        loop_uvs = np.zeros(len(mesh.loops) * 2, dtype=np.float32)
+        if mesh.uv_layers.active:
+            mesh.uv_layers.active.data.foreach_get("uv", loop_uvs)
+
+        mesh.calc_loop_triangles()
+        triangle_loops = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("loops", triangle_loops)
+        return {
+            "co": co.reshape(-1, 3),
+            "loop_vertices": loop_vertices,
+            "loop_uvs": loop_uvs.reshape(-1, 2),
+            "triangle_loops": triangle_loops.reshape(-1, 3),
+            "weights": self.read_vertex_weights(mesh),
         }
 
     def extract_skeleton_data(self, obj: Object):
@@ -119,90 +489,94 @@ class Bonedot_OT_ExportAnimation(bpy.types.Operator):
                     "angle": round(angle, 6),
                 }
             )
+        return bones
 
-    def extract_weights_dict_per_mesh(mesh_obj: Object):
-        mesh_data = mesh_obj.data
-        vertex_groups = mesh_obj.vertex_groups
-
-        vg_map = {vg.index: vg.name for vg in vertex_groups}
+    def read_vertex_weights(self, mesh):
+        """Every group assignment of ``mesh`` as a ``(vertex, group, weight)`` row.
 
-        weights = [{} for _ in mesh_data.vertices]
+        Vertex groups have no ``foreach_get``, so this is the one pass over
+        them, streamed into a single flat array instead of a list of rows;
+        everything after works on the array.
+        """
+        import numpy as np
 
-        for v in mesh_data.vertices:
-            for g in v.groups:
-                bone_name = vg_map.get(g.group)
-                if bone_name:
-                    weights[v.index][bone_name] = round(g.weight, 6)
+        values = chain.from_iterable(
+            (i, g.group, g.weight)
+            for i, v in enumerate(mesh.vertices)
+            for g in v.groups
+        )
+        return np.fromiter(values, dtype=np.float64).reshape(-1, 3)
 
-        return weights
+    def armature_actions(self, obj: Object):
+        return [
+            action
+            for action in bpy.data.actions
+            if self._action_affects_armature(action, obj)
+        ]
 
-    def extract_animation(self, obj: Object):
-        animations = []
-        for action in bpy.data.actions:
-            if self._action_affects_armature(action, obj):
-                frame_start, frame_end = action.frame_range
-                anima_data = self.bake_animation(obj, action, frame_start, frame_end)
-                animations.append({"name": action.name, "data": anima_data})
-        return animations
+    def extract_action(self, obj: Object, action):
+        frame_start, frame_end = action.frame_range
+        anima_data = self.bake_animation(obj, action, frame_start, frame_end)
+        return {"name": action.name, "data": anima_data}
 
     def bake_animation(
         self, armature_obj, action, frame_start, frame_end, epsilon=1e-5
     ):
-        bpy.context.view_layer.objects.active = armature_obj
-        duplicated_action = action.copy()
-        duplicated_action.name = action.name + "_baked"
-
-        armature_obj.animation_data.action = duplicated_action
-        bpy.ops.nla.bake(
-            frame_start=int(frame_start),
-            frame_end=int(frame_end),
-            only_selected=False,
-            visual_keying=True,
-            clear_constraints=False,
-            use_current_action=True,
-            bake_types={"POSE"},
-        )
-        pose_bones = armature_obj.pose.bones
-        bone_tracks = {}
-
-        for bone in pose_bones:
-            loc_track = []
-            rot_track = []
-
-            prev_loc = None
-            prev_rot = None
+        from bone_dot.core.animation import bone_tracks
 
-            for frame in range(int(frame_start), int(frame_end) + 1):
-                bpy.context.scene.frame_set(frame)
-
-                mat = bone.matrix
-                pos = mat.to_translation()
-                angle = mat.to_euler("XYZ").z
+        with profiler.span("sample poses"):
+            frames, bone_names, matrices = self.sample_pose_matrices(
+                armature_obj, action, int(frame_start), int(frame_end)
+            )
+        with profiler.span("reduce keys"):
+            tracks = bone_tracks(
+                frames,
+                bone_names,
+                matrices,
+                epsilon,
+                reduction=self.key_reduction,
+                location_tolerance=self.location_tolerance,
+                rotation_tolerance=self.rotation_tolerance,
+            )
+        # cubic reduction drops keys only a cubic curve brings back
+        interpolation = "cubic" if self.key_reduction == "CUBIC" else "linear"
+        return {
+            "fps": int(frame_end - frame_start + 1),
+            "interpolation": interpolation,
+            "tracks": tracks,
+        }
 
-                loc2d = [round(pos.x, 6), round(pos.y, 6)]
-                ang = round(angle, 6)
+    def sample_pose_matrices(self, armature_obj, action, frame_start, frame_end):
+        """Evaluate the scene once per frame and read every pose bone at once.
 
-                if (
-                    prev_loc is None
-                    or not isclose(prev_loc[0], loc2d[0], abs_tol=epsilon)
-                    or not isclose(prev_loc[1], loc2d[1], abs_tol=epsilon)
-                ):
-                    loc_track.append([frame, loc2d[0], loc2d[1]])
-                    prev_loc = loc2d
+        The pose bone matrices already include constraints, so this gives the
+        same visual keys as ``nla.bake`` without leaving baked actions behind.
+        """
+        import numpy as np
 
-                if prev_rot is None or not isclose(prev_rot, ang, abs_tol=epsilon):
-                    rot_track.append([frame, ang])
-                    prev_rot = ang
+        scene = bpy.context.scene
+        pose_bones = armature_obj.pose.bones
+        bone_names = [bone.name for bone in pose_bones]
+        frames = list(range(frame_start, frame_end + 1))
+        matrices = np.empty((len(frames), len(pose_bones), 4, 4), dtype=np.float32)
+        flat = np.empty(len(pose_bones) * 16, dtype=np.float32)
 
-            bone_tracks[bone.name] = {
-                "bone": bone.name,
-                "location": loc_track,
-                "rotation": rot_track,
-            }
-        return {
-            "fps": int(frame_end - frame_start + 1),
-            "tracks": list(bone_tracks.values()),
-        }
+        if armature_obj.animation_data is None:
+            armature_obj.animation_data_create()
+        prev_action = armature_obj.animation_data.action
+        prev_frame = scene.frame_current
+        armature_obj.animation_data.action = action
+        try:
+            for i, frame in enumerate(frames):
+                scene.frame_set(frame)
+                pose_bones.foreach_get("matrix", flat)
+                # RNA matrices are stored column major
+                matrices[i] = flat.reshape(-1, 4, 4).transpose(0, 2, 1)
+        finally:
+            armature_obj.animation_data.action = prev_action
+            scene.frame_set(prev_frame)
+        profiler.count("scene evaluations", len(frames) + 1)
+        return frames, bone_names, matrices
 
     def _action_affects_armature(self, action, armature_obj):
 
@@ -0,0 +1,107 @@
+import os
+
+import bpy
+from bpy.app.handlers import persistent
+
+
+def real_path(filepath) -> str:
+    return os.path.normcase(os.path.realpath(filepath))
+
+
+class ImageIndex:
+    """Image datablocks by the real path of their file.
+
+    Lookups cost a dict hit plus one stat of the requested file instead of
+    comparing against every image in the blend. Blender has no handler for
+    removed datablocks, so hits are checked against ``bpy.data`` and the
+    index rebuilds whenever the number of images changed behind its back.
+
+    ``mtimes`` only holds what :meth:`load` itself read or reloaded, so an
+    image indexed by a rebuild is reloaded once on its first hit in case
+    its file was edited outside of Blender.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.mtimes = {}
+        self.forget()
+
+    def forget(self):
+        self.by_path = {}
+        self.by_inode = {}
+        self.count = -1
+
+    def add(self, image, stat=None):
+        if image.packed_file or image.source != "FILE" or not image.filepath:
+            return
+        path = real_path(bpy.path.abspath(image.filepath, library=image.library))
+        if stat is None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+        self.by_path[path] = image.name
+        if stat is not None and stat.st_ino:
+            self.by_inode[(stat.st_dev, stat.st_ino)] = image.name
+
+    def refresh(self):
+        """Rebuild when images were added or removed since the last build."""
+        if self.count == len(bpy.data.images):
+            return
+        self.forget()
+        for image in bpy.data.images:
+            self.add(image)
+        self.mtimes = {
+            name: mtime
+            for name, mtime in self.mtimes.items()
+            if name in bpy.data.images
+        }
+        self.count = len(bpy.data.images)
+
+    def find(self, filepath, stat=None):
+        path = real_path(filepath)
+        for _ in range(2):
+            self.refresh()
+            name = self.by_path.get(path)
+            if name is None and stat is not None and stat.st_ino:
+                name = self.by_inode.get((stat.st_dev, stat.st_ino))
+            image = bpy.data.images.get(name) if name else None
+            if name is None or image is not None:
+                return image
+            # renamed or removed since it was indexed, look again
+            self.count = -1
+        return None
+
+    def load(self, filepath):
+        """Existing image of ``filepath``, reloaded only if the file changed."""
+        stat = os.stat(filepath)
+        image = self.find(filepath, stat)
+        if image is None:
+            image = bpy.data.images.load(filepath)
+            self.add(image, stat)
+            self.count = len(bpy.data.images)
+        elif self.mtimes.get(image.name) != stat.st_mtime_ns:
+            image.reload()
+        self.mtimes[image.name] = stat.st_mtime_ns
+        return image
+
+
+image_index = ImageIndex()
+
+
+@persistent
+def clear_image_index(*args):
+    image_index.clear()
+
+
+def register_handlers():
+    if clear_image_index not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(clear_image_index)
+
+
+def unregister_handlers():
+    if clear_image_index in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(clear_image_index)
+    image_index.clear()
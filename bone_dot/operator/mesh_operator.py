@@ -1,11 +1,24 @@
 import bmesh
 import bpy
 import os
+import time
 from bpy.types import Context, Event
-from PIL import Image
-import numpy as np
 from mathutils import Matrix, Vector
 
+from bone_dot.core.profile import profiler
+from bone_dot.dependencies import poll_ready
+
+
+def contour_cache():
+    from bone_dot.core.cache import ContourCache
+
+    # next to the .blend, or in Blender's session temp dir for unsaved files
+    if bpy.data.filepath:
+        directory = os.path.join(os.path.dirname(bpy.data.filepath), ".bonedot_cache")
+    else:
+        directory = os.path.join(bpy.app.tempdir, "bonedot_cache")
+    return ContourCache(directory)
+
 
 class Bonedot_OT_CutoffMesh(bpy.types.Operator):
     bl_idname = "bonedot.cutoff_mesh"
@@ -13,133 +26,347 @@ class Bonedot_OT_CutoffMesh(bpy.types.Operator):
     bl_description = "Cutoff mesh form image"
     bl_options = {"REGISTER", "UNDO"}
 
+    cut_method: bpy.props.EnumProperty(
+        name="Method",
+        items=[
+            ("KNIFE", "Knife Project", "Cut the plane with a projected cutter"),
+            ("TRIANGULATE", "Triangulate", "Rebuild the plane from the contour"),
+        ],
+        default="KNIFE",
+    )
+    simplify_mode: bpy.props.EnumProperty(
+        name="Simplify",
+        items=[
+            ("STRIDE", "Sample Rate", "Keep every Nth traced pixel"),
+            ("TOLERANCE", "Tolerance", "Drop points within a pixel error"),
+        ],
+        default="STRIDE",
+    )
     cut_sample_rate: bpy.props.IntProperty(name="Cut Sample Rate", default=16)
+    simplify_tolerance: bpy.props.FloatProperty(
+        name="Tolerance (px)",
+        description="Max distance of the simplified contour from the traced one",
+        default=1.0,
+        min=0.0,
+    )
+    max_vertices: bpy.props.IntProperty(
+        name="Vertex Budget",
+        description="Max contour vertices per sprite, 0 for no limit",
+        default=0,
+        min=0,
+    )
+    lod_levels: bpy.props.IntProperty(
+        name="LOD Levels",
+        description="Coarser meshes stored with the sprite for distant rendering",
+        default=0,
+        min=0,
+        max=6,
+    )
+    lod_tolerance: bpy.props.FloatProperty(
+        name="LOD Tolerance (px)",
+        description="Contour error of the first LOD, doubling with every level",
+        default=2.0,
+        min=0.1,
+    )
+    lod_screen_size: bpy.props.FloatProperty(
+        name="LOD Screen Size",
+        description=(
+            "Screen height fraction below which the first LOD is used, "
+            "halving with every level"
+        ),
+        default=0.5,
+        min=0.0,
+        max=1.0,
+        subtype="FACTOR",
+    )
+    use_parallel: bpy.props.BoolProperty(
+        name="Parallel",
+        description="Trace the selected sprites in a process pool",
+        default=True,
+    )
+    workers: bpy.props.IntProperty(
+        name="Workers",
+        description="Worker processes, 0 for one per CPU",
+        default=0,
+        min=0,
+    )
+    use_cache: bpy.props.BoolProperty(
+        name="Use Cache",
+        description="Reuse contours of unchanged images from the on-disk cache",
+        default=True,
+    )
+
+    @classmethod
+    def poll(cls, context: Context):
+        return poll_ready(cls)
 
     def invoke(self, context: Context, event: Event):
         return context.window_manager.invoke_props_dialog(self)
 
     def draw(self, context: Context):
         layout = self.layout
-        layout.prop(self, "cut_sample_rate")
+        layout.prop(self, "cut_method")
+        layout.prop(self, "simplify_mode")
+        if self.simplify_mode == "STRIDE":
+            layout.prop(self, "cut_sample_rate")
+        else:
+            layout.prop(self, "simplify_tolerance")
+            layout.prop(self, "max_vertices")
+        layout.prop(self, "lod_levels")
+        if self.lod_levels:
+            layout.prop(self, "lod_tolerance")
+            layout.prop(self, "lod_screen_size")
+        row = layout.row()
+        row.prop(self, "use_parallel")
+        row.prop(self, "workers")
+        layout.prop(self, "use_cache")
 
     def execute(self, context: Context):
-        for obj in context.selected_objects:
-            if obj is None:
-                self.report({"ERROR"}, "no selected object")
-                return {"CANCELLED"}
-
-            if obj.type != "MESH":
-                self.report({"ERROR"}, "object is not mesh")
-                return {"CANCELLED"}
-
-            if not (
-                obj.data is not None
-                and len(obj.data.polygons) == 1
-                and len(obj.data.vertices) == 4
-            ):
-                self.report({"ERROR"}, "object is not plane")
-                return {"CANCELLED"}
-
-            mat = obj.active_material
-            if not mat or not mat.use_nodes:
-                self.report({"ERROR"}, "object not have materials node")
-                return {"CANCELLED"}
-
-            img: bpy.types.Image = None
-            for node in mat.node_tree.nodes:
-                if node.type == "TEX_IMAGE":
-                    img = node.image
-                    break
-            else:
-                self.report({"ERROR"}, "can't find image node")
-                return {"CANCELLED"}
-
-            if img.packed_file:
-                self.report({"ERROR"}, "image is packed file can't load")
-                return {"CANCELLED"}
+        from bone_dot.core.cutoff import cut_sprites
 
+        jobs = []
+        for obj in context.selected_objects:
+            filepath, error = self.find_image_path(obj)
+            if error:
+                self.report({"WARNING"}, f"{obj.name}: {error}")
+                continue
+            jobs.append((obj, filepath))
+        if not jobs:
+            self.report({"ERROR"}, "no sprite plane selected")
+            return {"CANCELLED"}
+
+        start = time.perf_counter()
+        with profiler.span("cutoff mesh", sprites=len(jobs)):
+            with profiler.span("cut sprites"):
+                results = cut_sprites(
+                    [filepath for _, filepath in jobs],
+                    self.cut_params(),
+                    workers=self.workers if self.use_parallel else 1,
+                    cache=contour_cache() if self.use_cache else None,
+                )
+                self.profile_results(results)
+            cut_time = time.perf_counter() - start
+
+            done = 0
+            for (obj, _), result in zip(jobs, results):
+                if self.apply_result(context, obj, result):
+                    done += 1
+        self.report(
+            {"INFO"},
+            f"cut {done}/{len(jobs)} sprites in "
+            f"{time.perf_counter() - start:.2f}s (trace {cut_time:.2f}s)",
+        )
+        return {"FINISHED"} if done else {"CANCELLED"}
+
+    def profile_results(self, results):
+        """Hand the phase times measured in the workers to the profiler."""
+        if not profiler.enabled:
+            return
+        for result in results:
+            if "error" in result:
+                continue
+            for phase, seconds in result["timings"].items():
+                profiler.add(phase, seconds)
+            if "cache" not in result["timings"]:
+                w, h = result["size"]
+                profiler.count("pixels scanned", w * h)
+            profiler.count("vertices emitted", result["vertex_count"])
+
+    def find_image_path(self, obj):
+        if obj is None:
+            return None, "no selected object"
+
+        if obj.type != "MESH":
+            return None, "object is not mesh"
+
+        if not (
+            obj.data is not None
+            and len(obj.data.polygons) == 1
+            and len(obj.data.vertices) == 4
+        ):
+            return None, "object is not plane"
+
+        mat = obj.active_material
+        if not mat or not mat.use_nodes:
+            return None, "object not have materials node"
+
+        img = self.sprite_image(obj)
+        if img is None:
+            return None, "can't find image node"
+
+        if "bonedot_atlas_region" in obj:
+            # the node shows an atlas page, trace the sprite's own image
+            filepath = bpy.path.abspath(obj["bonedot_source_image"])
+        elif img.packed_file:
+            return None, "image is packed file can't load"
+        else:
             filepath = bpy.path.abspath(img.filepath)
 
-            if not os.path.exists(filepath):
-                self.report({"ERROR"}, "can't find image path")
-                return {"CANCELLED"}
+        if not os.path.exists(filepath):
+            return None, "can't find image path"
+        return filepath, None
+
+    def sprite_image(self, obj) -> bpy.types.Image:
+        mat = obj.active_material
+        if not mat or not mat.use_nodes:
+            return None
+        for node in mat.node_tree.nodes:
+            if node.type == "TEX_IMAGE":
+                return node.image
+        return None
+
+    def image_uvs(self, obj, points, image_size):
+        """UVs of traced pixels on the image the material shows.
+
+        That is the traced image itself, or the atlas page Build Atlas
+        copied it to.
+        """
+        import numpy as np
+
+        from bone_dot.core.atlas import atlas_placement, remap_uvs
+
+        w, h = image_size
+        uvs = np.column_stack((points[:, 0] / w, 1.0 - points[:, 1] / h))
+        packed = atlas_placement(obj)
+        if packed is None:
+            return uvs
+        _, region, placement = packed
+        page_size = tuple(self.sprite_image(obj).size)
+        return remap_uvs(uvs, image_size, region, placement, page_size)
+
+    def cut_params(self):
+        return {
+            "simplify_mode": self.simplify_mode,
+            "sample_rate": self.cut_sample_rate,
+            "tolerance": self.simplify_tolerance,
+            "max_vertices": self.max_vertices,
+            "triangulate": self.cut_method == "TRIANGULATE",
+            "lod_levels": self.lod_levels,
+            "lod_tolerance": self.lod_tolerance,
+        }
+
+    def apply_result(self, context, obj, result):
+        if "error" in result:
+            self.report({"WARNING"}, f"{obj.name}: {result['error']}")
+            return False
+        if not result["contours"]:
+            self.report({"WARNING"}, f"{obj.name}: image has no opaque pixels")
+            return False
+
+        scale = context.scene.bonedot_scale
+        if self.cut_method == "TRIANGULATE":
+            if not len(result["triangles"]):
+                self.report({"WARNING"}, f"{obj.name}: contour is too small")
+                return False
+            with profiler.span("fill mesh"):
+                self.fill_mesh(
+                    obj, result["points"], result["triangles"], result["size"], scale
+                )
+        else:
+            with profiler.span("knife project"):
+                cutter_obj = self.make_cutter_mesh(
+                    obj, "cut_tool", result["contours"], result["size"], scale
+                )
+                self.boolean_difference(context, obj, cutter_obj)
+        with profiler.span("store lods"):
+            self.store_lods(obj, result.get("lods", []), result["size"], scale)
+
+        timings = " ".join(f"{k} {v:.3f}s" for k, v in result["timings"].items())
+        message = f"{obj.name}: {result['vertex_count']} contour vertices"
+        if self.simplify_mode != "STRIDE":
+            saved = result["stride_count"] - result["vertex_count"]
+            message += f", {saved} saved against sample rate {self.cut_sample_rate}"
+        if result.get("lods"):
+            counts = "/".join(str(len(lod["points"])) for lod in result["lods"])
+            message += f", LOD vertices {counts}"
+        self.report({"INFO"}, f"{message} ({timings})")
+        return True
+
+    def make_cutter_mesh(self, obj, name, contours_px, image_size, scale):
+        import numpy as np
+
+        from bone_dot.core.mesh import sprite_origin
 
-            pil_img = Image.open(filepath).convert("RGBA")
-            edge_points = self.trace_alpha_contour(pil_img)
-            contour_px = edge_points[:: self.cut_sample_rate]
-            cutter_obj = self.make_cutter_mesh(
-                "cut_tool", contour_px, pil_img.size, context.scene.bonedot_scale
-            )
-            self.boolean_difference(context, obj, cutter_obj)
-            return {"FINISHED"}
-
-    def trace_alpha_contour(self, pil_image: Image.Image, alpha_thresh=1):
-        w, h = pil_image.size
-        alpha = pil_image.getchannel("A")
-        alpha_data = alpha.load()
-
-        # 二值化
-        mask = np.zeros((h, w), dtype=bool)
-        for y in range(h):
-            for x in range(w):
-                mask[y, x] = alpha_data[x, y] >= alpha_thresh
-
-        dirs = [(-1, -1), (0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0)]
-        start = None
-        for y in range(h):
-            for x in range(w):
-                if not mask[y, x]:
-                    continue
-                for dx, dy in dirs:
-                    nx, ny = x + dx, y + dy
-                    if not (0 <= nx < w and 0 <= ny < h) or not mask[ny, nx]:
-                        start = (x, y)
-                        break
-                if start:
-                    break
-            if start:
-                break
-        if not start:
-            return []
-
-        contour = [start]
-        curr = start
-        prev_dir = 7
-
-        while True:
-            found = False
-            for i in range(1, 9):
-                d = (prev_dir + i) % 8
-                dx, dy = dirs[d]
-                nx, ny = curr[0] + dx, curr[1] + dy
-                if 0 <= nx < w and 0 <= ny < h and mask[ny, nx]:
-                    contour.append((nx, ny))
-                    prev_dir = (d + 4) % 8
-                    curr = (nx, ny)
-                    found = True
-                    break
-            if not found or curr == start:
-                break
-
-        return contour
-
-    def make_cutter_mesh(self, name, contour_px, image_size, scale):
         w, h = image_size
+        # cut where fill_mesh would put the vertices on a trimmed or pivoted sprite
+        offset = np.asarray(sprite_origin(obj, image_size))
         mesh = bpy.data.meshes.new(name)
-        obj = bpy.data.objects.new(name, mesh)
-        bpy.context.collection.objects.link(obj)
+        cutter = bpy.data.objects.new(name, mesh)
+        bpy.context.collection.objects.link(cutter)
 
         bm = bmesh.new()
-        verts = [bm.verts.new(self.pixel_to_local(p, w, h, scale)) for p in contour_px]
-        bm.verts.ensure_lookup_table()
-        try:
-            bm.faces.new(verts)
-        except ValueError:
-            pass
+        # one closed edge loop per island and hole, knife_project only needs edges
+        for contour_px in contours_px:
+            if len(contour_px) < 3:
+                continue
+            verts = [
+                bm.verts.new(self.pixel_to_local(p - offset, w, h, scale))
+                for p in contour_px
+            ]
+            for i, vert in enumerate(verts):
+                bm.edges.new((vert, verts[i - 1]))
         bm.to_mesh(mesh)
         bm.free()
 
-        return obj
+        return cutter
+
+    def fill_mesh(self, obj, points, triangles, image_size, scale):
+        import numpy as np
+
+        from bone_dot.core.mesh import sprite_origin
+
+        # works on the mesh data only, no mode switch or 3D view needed
+        w, h = image_size
+        uvs = self.image_uvs(obj, points, image_size)
+        # trimmed or pivoted sprites are not centred on the image
+        offset = np.asarray(sprite_origin(obj, image_size))
+
+        bm = bmesh.new()
+        uv_layer = bm.loops.layers.uv.new("UVMap")
+        verts = [
+            bm.verts.new(self.pixel_to_local(p - offset, w, h, scale)) for p in points
+        ]
+        for tri in triangles.tolist():
+            # sprite planes face -Z, so flip the image space winding
+            face = bm.faces.new([verts[i] for i in reversed(tri)])
+            for loop, i in zip(face.loops, reversed(tri)):
+                loop[uv_layer].uv = uvs[i]
+        bm.to_mesh(obj.data)
+        bm.free()
+        obj.data.update()
+
+    def store_lods(self, obj, lods, image_size, scale):
+        """Keep the LOD meshes in a custom property, replacing older ones.
+
+        Each level holds flat local ``co`` and ``uvs`` pairs and ``triangles``
+        wound like the faces of :meth:`fill_mesh`, next to the contour
+        ``tolerance`` and the ``screen_size`` it is meant to be used below.
+        """
+        import numpy as np
+
+        from bone_dot.core.mesh import sprite_origin
+
+        if not lods:
+            if "bonedot_lods" in obj:
+                del obj["bonedot_lods"]
+            return
+        w, h = image_size
+        centre = np.asarray((w / 2, h / 2)) + sprite_origin(obj, image_size)
+        stored = []
+        for level, lod in enumerate(lods):
+            points = lod["points"]
+            co = (points - centre) * scale
+            uvs = self.image_uvs(obj, points, image_size)
+            stored.append(
+                {
+                    "tolerance": float(lod["tolerance"]),
+                    "screen_size": self.lod_screen_size / 2**level,
+                    "co": co.reshape(-1).tolist(),
+                    "uvs": uvs.reshape(-1).tolist(),
+                    "triangles": lod["triangles"][:, ::-1].reshape(-1).tolist(),
+                }
+            )
+        obj["bonedot_lods"] = stored
 
     def boolean_difference(self, context, obj, cutter):
         # 让位置相同
@@ -169,6 +396,22 @@ class Bonedot_OT_CutoffMesh(bpy.types.Operator):
         return Vector((lx, ly, 0.0))
 
 
+class Bonedot_OT_ClearContourCache(bpy.types.Operator):
+    bl_idname = "bonedot.clear_contour_cache"
+    bl_label = "Clear Contour Cache"
+    bl_description = "Delete the cached Cutoff Mesh contours"
+    bl_options = {"REGISTER"}
+
+    @classmethod
+    def poll(cls, context: Context):
+        return poll_ready(cls)
+
+    def execute(self, context: Context):
+        removed = contour_cache().clear()
+        self.report({"INFO"}, f"removed {removed} cached contours")
+        return {"FINISHED"}
+
+
 class Bonedot_OT_TrisToQuads(bpy.types.Operator):
     bl_idname = "bonedot.tris_to_quads"
     bl_label = "Tris to Quads"
@@ -0,0 +1,58 @@
+import bpy
+from bpy.types import Context
+from bpy_extras.io_utils import ExportHelper
+
+from bone_dot.core.profile import profiler
+
+
+class Bonedot_OT_ToggleProfiling(bpy.types.Operator):
+    """Start or stop recording phase timings of the BoneDot operators"""
+
+    bl_idname = "bonedot.toggle_profiling"
+    bl_label = "Toggle Profiling"
+    bl_options = {"REGISTER"}
+
+    def execute(self, context: Context):
+        profiler.enabled = not profiler.enabled
+        state = "started" if profiler.enabled else "stopped"
+        self.report({"INFO"}, f"Profiling {state}")
+        return {"FINISHED"}
+
+
+class Bonedot_OT_ClearProfile(bpy.types.Operator):
+    bl_idname = "bonedot.clear_profile"
+    bl_label = "Clear Profile"
+    bl_description = "Forget the recorded timings and counters"
+    bl_options = {"REGISTER"}
+
+    def execute(self, context: Context):
+        profiler.clear()
+        return {"FINISHED"}
+
+
+class Bonedot_OT_WriteTrace(bpy.types.Operator, ExportHelper):
+    bl_idname = "bonedot.write_trace"
+    bl_label = "Write Trace"
+    bl_description = (
+        "Save the recorded timings as Chrome trace events, "
+        "for chrome://tracing or Perfetto"
+    )
+    bl_options = {"REGISTER"}
+
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={"HIDDEN"})
+
+    def execute(self, context: Context):
+        if not profiler.events:
+            self.report({"WARNING"}, "Nothing recorded yet")
+            return {"CANCELLED"}
+        try:
+            profiler.write_trace(self.filepath)
+        except OSError as e:
+            self.report({"ERROR"}, f"Can't write {self.filepath}: {e}")
+            return {"CANCELLED"}
+        message = f"{len(profiler.events)} trace events written"
+        if profiler.dropped:
+            message += f", {profiler.dropped} dropped over the limit"
+        self.report({"INFO"}, message)
+        return {"FINISHED"}
@@ -1,18 +1,30 @@
 import bpy
-import bmesh
 from bpy.types import Context
 from bpy.props import (
     CollectionProperty,
+    EnumProperty,
     FloatProperty,
     FloatVectorProperty,
+    IntProperty,
+    IntVectorProperty,
     StringProperty,
     BoolProperty,
 )
 import os
-from mathutils import Vector
+import time
+from itertools import islice
+from mathutils import Matrix, Vector
 
 from bpy_extras.io_utils import ImportHelper
 
+from bone_dot.core.manifest import ManifestError, iter_manifest
+from bone_dot.core.profile import profiler
+from bone_dot.dependencies import poll_ready
+from bone_dot.operator.image_index import image_index
+
+# NumPy and PIL backed modules are imported by the methods using them, so
+# registering the addon does not load them
+
 
 class Bonedot_OT_CreateMaterialGroup(bpy.types.Operator):
     bl_idname = "bonedot.create_material_group"
@@ -153,6 +165,98 @@ class Bonedot_OT_CreateMaterialGroup(bpy.types.Operator):
         return {"FINISHED"}
 
 
+def new_sprite_object(name, width, height, scale, rect=None, origin=None):
+    """Unlinked sprite object with a UV mapped quad around its origin.
+
+    With a trimmed ``rect`` the quad only covers that pixel box; the box and
+    the number of cropped pixels are kept on the object for the exporter.
+    ``origin`` is the pixel offset of the object origin from the image
+    centre, the centre of ``rect`` by default.
+    """
+    from bone_dot.core.mesh import sprite_quad, trim_offset
+
+    size = (width, height)
+    center = trim_offset(rect, size)
+    verts, uvs = sprite_quad(size, scale, rect)
+    if origin is not None:
+        verts[:, 0] += (center[0] - origin[0]) * scale
+        verts[:, 1] += (center[1] - origin[1]) * scale
+    me = bpy.data.meshes.new(name)
+    me.from_pydata(verts.tolist(), [], [[0, 1, 2, 3]])
+    uv_layer = me.uv_layers.new(name="UVMap")
+    uv_layer.data.foreach_set("uv", uvs.reshape(-1))
+    me.update()
+
+    obj = bpy.data.objects.new(name, me)
+    v_group = obj.vertex_groups.new(name="bonedot_base_sprite")
+    v_group.add([0, 1, 2, 3], 1.0, "REPLACE")
+    v_group.lock_weight = True
+    mod = obj.modifiers.new("bonedot_base_sprite", "MASK")
+    mod.vertex_group = "bonedot_base_sprite"
+    mod.invert_vertex_group = True
+    mod.show_in_editmode = True
+    mod.show_render = False
+    mod.show_viewport = False
+    mod.show_on_cage = True
+    obj["sprite"] = True
+    if rect:
+        x0, y0, x1, y1 = rect
+        obj["bonedot_trim"] = list(rect)
+        obj["bonedot_source_size"] = [width, height]
+        obj["bonedot_cropped_pixels"] = width * height - (x1 - x0) * (y1 - y0)
+    if origin is not None:
+        obj["bonedot_origin"] = list(origin)
+    return obj
+
+
+def create_sprite_material(mesh, image):
+    """Material showing ``image`` through the Bonedot node group."""
+    mat = bpy.data.materials.new(image.name)
+    mat.use_nodes = True
+    mat.blend_method = "BLEND"
+    node_tree = mat.node_tree
+    output_node = None
+
+    for node in mat.node_tree.nodes:
+        if node.type != "OUTPUT_MATERIAL":
+            mat.node_tree.nodes.remove(node)
+        else:
+            output_node = node
+
+    tex_node = node_tree.nodes.new("ShaderNodeTexImage")
+    tex_node.interpolation = "Closest"
+    tex_node.image = image
+    bonedot_node_tree = bpy.data.node_groups["Bonedot Material"]
+    bonedot_node = node_tree.nodes.new("ShaderNodeGroup")
+    bonedot_node.name = "Bonedot Material"
+    bonedot_node.label = "Bonedot Material"
+    bonedot_node.node_tree = bonedot_node_tree
+    bonedot_node.inputs["Alpha"].default_value = 1.0
+    bonedot_node.inputs["Modulate Color"].default_value = [1, 1, 1, 1]
+
+    node_tree.links.new(
+        bonedot_node.inputs["Texture Color"],
+        tex_node.outputs["Color"],
+        verify_limits=True,
+    )
+    node_tree.links.new(
+        bonedot_node.inputs["Texture Alpha"],
+        tex_node.outputs["Alpha"],
+        verify_limits=True,
+    )
+    node_tree.links.new(
+        bonedot_node.outputs["BSDF"],
+        output_node.inputs["Surface"],
+        verify_limits=True,
+    )
+
+    tex_node.location = (0, 0)
+    bonedot_node.location = (280, 0)
+    output_node.location = (460, 0)
+    mesh.materials.append(mat)
+    return mat
+
+
 # Import Single Sprite
 
 
@@ -166,33 +270,36 @@ class Bonedot_OT_ImportSingleSprite(bpy.types.Operator):
     scale: FloatProperty(name="Sprite Scale", default=0.01)
     offset: FloatVectorProperty(default=Vector((0, 0, 0)))
     tilesize: FloatVectorProperty(default=Vector((1, 1)), size=2)
+    trim: BoolProperty(
+        name="Trim",
+        description="Crop the transparent borders off the sprite quad",
+        default=False,
+    )
+
+    @classmethod
+    def poll(cls, context: Context):
+        return poll_ready(cls)
 
     def execute(self, context: Context):
+        from bone_dot.core.probe import sprite_layout
+
         if os.path.exists(self.path):
-            data = bpy.data
-            sprite_name = os.path.basename(self.path)
-            sprite_found = False
-
-            # find image
-            for image in bpy.data.images:
-                if os.path.exists(bpy.path.abspath(image.filepath)) and os.path.exists(
-                    self.path
-                ):
-                    if os.path.samefile(bpy.path.abspath(image.filepath), self.path):
-                        sprite_found = True
-                        img = image
-                        img.reload()
-                        break
-            if not sprite_found:
-                img = data.images.load(self.path)
-            obj = self.create_mesh(
-                context,
-                name=img.name,
-                width=img.size[0],
-                height=img.size[1],
-                pos=self.pos,
-            )
-            self.create_material(context, obj.data, name=img.name)
+            with profiler.span("import sprite"):
+                with profiler.span("load image"):
+                    img = image_index.load(self.path)
+                with profiler.span("probe header"):
+                    size, rect = sprite_layout(self.path, self.trim)
+                if self.trim:
+                    profiler.count("pixels scanned", size[0] * size[1])
+                obj = self.create_mesh(
+                    context,
+                    name=img.name,
+                    width=size[0],
+                    height=size[1],
+                    pos=self.pos,
+                    rect=rect,
+                )
+                self.create_material(context, obj.data, name=img.name)
 
             selected_objects = []
             for obj2 in context.selected_objects:
@@ -211,29 +318,6 @@ class Bonedot_OT_ImportSingleSprite(bpy.types.Operator):
         wm = context.window_manager
         return wm.invoke_props_dialog(self)
 
-    def create_verts(self, width, height, pos, me, tag_hide=False):
-        bpy.ops.object.mode_set(mode="EDIT")
-        bm = bmesh.from_edit_mesh(me)
-        z_pos = 0  # lock z
-        vert1 = bm.verts.new(Vector((0, 0, z_pos)) * self.scale)
-        vert2 = bm.verts.new(Vector((width, 0, z_pos)) * self.scale)
-        vert3 = bm.verts.new(Vector((width, -height, z_pos)) * self.scale)
-        vert4 = bm.verts.new(Vector((0, -height, z_pos)) * self.scale)
-
-        bm.faces.new([vert1, vert2, vert3, vert4])
-
-        bmesh.update_edit_mesh(me)
-
-        if tag_hide:
-            for vert in bm.verts:
-                vert.hide_viewport = True
-
-            for edge in bm.edges:
-                edge.hide_viewport = True
-
-        bmesh.update_edit_mesh(me)
-        bpy.ops.object.mode_set(mode="OBJECT")
-
     def create_mesh(
         self,
         context: Context,
@@ -241,81 +325,26 @@ class Bonedot_OT_ImportSingleSprite(bpy.types.Operator):
         width=100,
         height=100,
         pos=Vector((0, 0, 0)),
+        rect=None,
     ):
-        me = bpy.data.meshes.new(name)
-        obj = bpy.data.objects.new(name, me)
+        from bone_dot.core.mesh import trim_offset
+
+        obj = new_sprite_object(name, width, height, self.scale, rect)
         bpy.context.collection.objects.link(obj)
         bpy.context.view_layer.objects.active = obj
         obj.select_set(True)
-
-        self.create_verts(width, height, pos, me, tag_hide=False)
-        v_group = obj.vertex_groups.new(name="bonedot_base_sprite")
-        v_group.add([0, 1, 2, 3], 1.0, "REPLACE")
-        v_group.lock_weight = True
-        mod = obj.modifiers.new("bonedot_base_sprite", "MASK")
-        mod.vertex_group = "bonedot_base_sprite"
-        mod.invert_vertex_group = True
-        mod.show_in_editmode = True
-        mod.show_render = False
-        mod.show_viewport = False
-        mod.show_on_cage = True
-        obj.data.uv_layers.new(name="UVMap")
-        bpy.ops.object.mode_set(mode="OBJECT")
-        bpy.ops.object.origin_set(type="ORIGIN_GEOMETRY", center="BOUNDS")
+        # a trimmed quad is centred on its box, shift it back over the image
+        dx, dy = trim_offset(rect, (width, height))
         obj.location = (
             Vector((pos[0], pos[1], -pos[2])) * self.scale
-            + Vector((self.offset[0], self.offset[1], self.offset[2])) * self.scale
+            + Vector((self.offset[0] + dx, self.offset[1] + dy, self.offset[2]))
+            * self.scale
         )
-
-        obj["sprite"] = True
         return obj
 
     def create_material(self, context, mesh, name="Sprite"):
-        mat = bpy.data.materials.new(name)
-        mat.use_nodes = True
-        mat.blend_method = "BLEND"
-        node_tree = mat.node_tree
-        output_node = None
-
-        for node in mat.node_tree.nodes:
-            if node.type != "OUTPUT_MATERIAL":
-                mat.node_tree.nodes.remove(node)
-            else:
-                output_node = node
-
-        tex_node = node_tree.nodes.new("ShaderNodeTexImage")
-        tex_node.interpolation = "Closest"
-        tex_node.image = bpy.data.images[name]
         bpy.ops.bonedot.create_material_group()
-        bonedot_node_tree = bpy.data.node_groups["Bonedot Material"]
-        bonedot_node = node_tree.nodes.new("ShaderNodeGroup")
-        bonedot_node.name = "Bonedot Material"
-        bonedot_node.label = "Bonedot Material"
-        bonedot_node.node_tree = bonedot_node_tree
-        bonedot_node.inputs["Alpha"].default_value = 1.0
-        bonedot_node.inputs["Modulate Color"].default_value = [1, 1, 1, 1]
-
-        node_tree.links.new(
-            bonedot_node.inputs["Texture Color"],
-            tex_node.outputs["Color"],
-            verify_limits=True,
-        )
-        node_tree.links.new(
-            bonedot_node.inputs["Texture Alpha"],
-            tex_node.outputs["Alpha"],
-            verify_limits=True,
-        )
-        node_tree.links.new(
-            bonedot_node.outputs["BSDF"],
-            output_node.inputs["Surface"],
-            verify_limits=True,
-        )
-
-        tex_node.location = (0, 0)
-        bonedot_node.location = (280, 0)
-        output_node.location = (460, 0)
-        mesh.materials.append(mat)
-        return mat
+        return create_sprite_material(mesh, bpy.data.images[name])
 
 
 # Import Mutiple Sprite
@@ -331,20 +360,161 @@ class Bonedot_OT_ImportSprites(bpy.types.Operator, ImportHelper):
     filter_image: BoolProperty(default=True, options={"HIDDEN", "SKIP_SAVE"})
     filter_movie: BoolProperty(default=True, options={"HIDDEN", "SKIP_SAVE"})
     filter_folder: BoolProperty(default=True, options={"HIDDEN", "SKIP_SAVE"})
-    filter_glob: StringProperty(default="*.json", options={"HIDDEN"})
+    filter_glob: StringProperty(default="*.json;*.jsonl", options={"HIDDEN"})
     replace: BoolProperty(name="Update Existing", default=True)
+    trim: BoolProperty(
+        name="Trim",
+        description="Crop the transparent borders off the sprite quads",
+        default=False,
+    )
+
+    @classmethod
+    def poll(cls, context: Context):
+        return poll_ready(cls)
 
     def execute(self, context: Context):
         folder = os.path.dirname(self.filepath)
         self.set_viewport_shading(context)
-        for i in self.files:
-            filepath = os.path.join(folder, i.name)
-            if i.name not in bpy.data.objects:
-                bpy.ops.bonedot.import_sprite(
-                    path=filepath, scale=context.scene.bonedot_scale
-                )
+        scale = context.scene.bonedot_scale
+        start = time.perf_counter()
+        with profiler.span("import sprites"):
+            bpy.ops.bonedot.create_material_group()
+            with profiler.span("refresh image index"):
+                image_index.refresh()
+
+            objects = []
+            filepaths = []
+            for i in self.files:
+                filepath = os.path.join(folder, i.name)
+                if os.path.splitext(i.name)[1].lower() in (".json", ".jsonl"):
+                    objects += self.import_layout(context, filepath, scale)
+                elif i.name not in bpy.data.objects:
+                    filepaths.append(filepath)
+            objects += self.import_batch(filepaths, scale)
+            with profiler.span("link objects"):
+                self.link_objects(context, objects)
+        self.report(
+            {"INFO"},
+            f"{len(objects)} sprites imported in {time.perf_counter() - start:.2f}s",
+        )
         return {"FINISHED"}
 
+    def new_sprite(self, filepath, size, rect, scale, pivot=None, name=None):
+        from bone_dot.core.mesh import pivot_origin, trim_offset
+
+        # a loaded image only decodes its pixels once something draws it,
+        # reading img.size here would force that
+        with profiler.span("load image"):
+            img = image_index.load(filepath)
+        origin = trim_offset(rect, size) if pivot is None else pivot_origin(size, pivot)
+        with profiler.span("build object"):
+            obj = new_sprite_object(name or img.name, *size, scale, rect, origin)
+            obj.location = (origin[0] * scale, origin[1] * scale, 0)
+        with profiler.span("material"):
+            create_sprite_material(obj.data, img)
+        profiler.count("sprites created")
+        return obj
+
+    def probe_layouts(self, filepaths):
+        from bone_dot.core.probe import sprite_layouts
+
+        with profiler.span("probe headers", files=len(filepaths)):
+            layouts = sprite_layouts(filepaths, self.trim)
+        if self.trim:
+            profiler.count(
+                "pixels scanned", sum(size[0] * size[1] for size, _ in layouts if size)
+            )
+        return layouts
+
+    def import_batch(self, filepaths, scale):
+        """Build every sprite straight from data, without operator calls.
+
+        Nothing switches modes or pushes undo steps per sprite, so the whole
+        import is the single undo step of this operator.
+        """
+        # sizes come from the file headers, so no image is decoded up front
+        layouts = self.probe_layouts(filepaths)
+        objects = []
+        for filepath, (size, rect) in zip(filepaths, layouts):
+            if size is None:
+                self.report({"WARNING"}, f"{filepath} is not a readable image")
+                continue
+            objects.append(self.new_sprite(filepath, size, rect, scale))
+        return objects
+
+    def import_layout(self, context: Context, path, scale):
+        """Place the sprites listed in a layout manifest on their canvas spots.
+
+        Entries are read a chunk at a time, so the manifest is never held in
+        memory as a whole. Parent bones are looked up on the active armature.
+        """
+        armature = context.object
+        if armature is not None and armature.type != "ARMATURE":
+            armature = None
+        objects = []
+        missing = set()
+        entries = iter_manifest(path)
+        try:
+            while True:
+                with profiler.span("read manifest"):
+                    chunk = list(islice(entries, 256))
+                if not chunk:
+                    break
+                layouts = self.probe_layouts([e["file"] for e in chunk])
+                for entry, (size, rect) in zip(chunk, layouts):
+                    if size is None:
+                        self.report(
+                            {"WARNING"}, f"{entry['file']} is not a readable image"
+                        )
+                        continue
+                    obj = self.new_sprite(
+                        entry["file"], size, rect, scale, entry["pivot"], entry["name"]
+                    )
+                    # canvas top left corner to image centre, z like pos[2]
+                    x, y = entry["pos"]
+                    obj.location += (
+                        Vector((x + size[0] / 2, y + size[1] / 2, -entry["z"])) * scale
+                    )
+                    if entry["parent"] and not self.parent_to_bone(
+                        obj, armature, entry["parent"]
+                    ):
+                        missing.add(entry["parent"])
+                    objects.append(obj)
+        except (ManifestError, OSError) as e:
+            self.report({"ERROR"}, f"{os.path.basename(path)}: {e}")
+        if missing:
+            self.report(
+                {"WARNING"}, f"Parent bones not found: {', '.join(sorted(missing))}"
+            )
+        return objects
+
+    def parent_to_bone(self, obj, armature, bone_name) -> bool:
+        if armature is None or bone_name not in armature.pose.bones:
+            return False
+        pose_bone = armature.pose.bones[bone_name]
+        obj.parent = armature
+        obj.parent_type = "BONE"
+        obj.parent_bone = bone_name
+        # bone children hang off the tail; cancel that out so the sprite
+        # stays where the canvas put it
+        parent_matrix = (
+            armature.matrix_world
+            @ pose_bone.matrix
+            @ Matrix.Translation((0, pose_bone.length, 0))
+        )
+        obj.matrix_parent_inverse = parent_matrix.inverted()
+        return True
+
+    def link_objects(self, context: Context, objects):
+        for obj in context.selected_objects:
+            obj.select_set(False)
+        collection = context.collection
+        for obj in objects:
+            collection.objects.link(obj)
+            obj.select_set(True)
+        if objects:
+            context.view_layer.objects.active = objects[-1]
+
     def set_viewport_shading(self, context: Context):
         for area in bpy.context.screen.areas:
             if area.type == "VIEW_3D":
@@ -352,3 +522,102 @@ class Bonedot_OT_ImportSprites(bpy.types.Operator, ImportHelper):
                     if space.type == "VIEW_3D":
                         space.shading.type = "MATERIAL"
                         return
+
+
+class Bonedot_OT_ImportSpriteSheet(bpy.types.Operator, ImportHelper):
+    bl_idname = "bonedot.import_sprite_sheet"
+    bl_label = "Import Sprite Sheet"
+    bl_description = "Slice one texture into sprites sharing its image and material"
+    bl_options = {"REGISTER", "UNDO"}
+
+    filter_image: BoolProperty(default=True, options={"HIDDEN", "SKIP_SAVE"})
+    filter_folder: BoolProperty(default=True, options={"HIDDEN", "SKIP_SAVE"})
+
+    slice_mode: EnumProperty(
+        name="Slice",
+        items=[
+            ("GRID", "Grid", "Cut the sheet into equal tiles"),
+            ("RECTS", "Rect List", "Cut the boxes listed in a JSON file"),
+        ],
+        default="GRID",
+    )
+    tilesize: IntVectorProperty(name="Tile Size", default=(64, 64), min=1, size=2)
+    margin: IntProperty(name="Margin", description="Pixels around the grid", min=0)
+    spacing: IntProperty(name="Spacing", description="Pixels between tiles", min=0)
+    rects_path: StringProperty(
+        name="Rect List",
+        description="JSON list of [x, y, w, h] boxes or a TexturePacker frame list",
+        subtype="FILE_PATH",
+    )
+    skip_empty: BoolProperty(
+        name="Skip Empty",
+        description="Leave out cells without a single opaque pixel",
+        default=True,
+    )
+
+    @classmethod
+    def poll(cls, context: Context):
+        return poll_ready(cls)
+
+    def cells(self, size):
+        from bone_dot.core.sheet import (
+            clip_cells,
+            grid_cells,
+            opaque_cells,
+            read_rects,
+            sheet_alpha_mask,
+        )
+
+        if self.slice_mode == "RECTS":
+            cells, names = read_rects(bpy.path.abspath(self.rects_path))
+        else:
+            cells = grid_cells(size, self.tilesize, self.margin, self.spacing)
+            names = [None] * len(cells)
+        keep = clip_cells(cells, size)
+        if self.skip_empty and keep.any():
+            keep[keep] = opaque_cells(sheet_alpha_mask(self.filepath), cells[keep])
+            profiler.count("pixels scanned", size[0] * size[1])
+        return cells[keep], [name for name, k in zip(names, keep.tolist()) if k]
+
+    def execute(self, context: Context):
+        from bone_dot.core.mesh import trim_offset
+        from bone_dot.core.probe import probe_size
+
+        try:
+            with profiler.span("slice sheet"):
+                size = probe_size(self.filepath)
+                cells, names = self.cells(size)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.report({"ERROR"}, f"Can't slice {self.filepath}: {e}")
+            return {"CANCELLED"}
+        if not len(cells):
+            self.report({"WARNING"}, "No cells to import")
+            return {"CANCELLED"}
+
+        scale = context.scene.bonedot_scale
+        bpy.ops.bonedot.create_material_group()
+        img = image_index.load(self.filepath)
+        stem = os.path.splitext(img.name)[0]
+        mat = None
+        objects = []
+        with profiler.span("build sheet sprites", cells=len(cells)):
+            for i, (rect, name) in enumerate(zip(cells.tolist(), names)):
+                obj = new_sprite_object(name or f"{stem}_{i}", *size, scale, rect)
+                # every tile keeps its spot on the sheet
+                dx, dy = trim_offset(rect, size)
+                obj.location = (dx * scale, dy * scale, 0)
+                if mat is None:
+                    mat = create_sprite_material(obj.data, img)
+                else:
+                    obj.data.materials.append(mat)
+                objects.append(obj)
+        profiler.count("sprites created", len(objects))
+
+        for obj in context.selected_objects:
+            obj.select_set(False)
+        for obj in objects:
+            context.collection.objects.link(obj)
+            obj.select_set(True)
+        context.view_layer.objects.active = objects[-1]
+        self.report({"INFO"}, f"{len(objects)} sprites sliced from {img.name}")
+        return {"FINISHED"}
@@ -1,46 +1,182 @@
+import bmesh
 import bpy
 from bpy.types import Context, Event, Object
 
+from bone_dot.core.profile import profiler
+from bone_dot.dependencies import poll_ready
+
 
 class Bonedot_OT_ModalUVSyncOperator(bpy.types.Operator):
+    """Move the vertices of the selected sprites along with their UVs"""
+
     bl_idname = "bonedot.modal_uv_sync"
     bl_label = "Start UV Sync"
 
-    def sync_uv_to_vertex(self, obj, scale=0.01):
-        w, h = self.get_tex_image_size(obj)
-        mesh = obj.data
-        uv_layer = mesh.uv_layers.active
-        if not uv_layer:
-            return
+    interval: bpy.props.FloatProperty(
+        name="Interval",
+        description="Seconds between two checks for UV changes",
+        default=0.05,
+        min=0.01,
+        max=1.0,
+    )
 
-        uv_data = uv_layer.data
+    # set while a sync is live, pressing the button again stops it
+    running = False
 
-        for loop in mesh.loops:
-            uv = uv_data[loop.index].uv
-            vert = mesh.vertices[loop.vertex_index]
-            vert.co.x = (uv.x - 0.5) * w * scale
-            vert.co.y = -(uv.y - 0.5) * h * scale
+    @classmethod
+    def poll(cls, context: Context):
+        return poll_ready(cls)
 
     def get_tex_image_size(self, obj: Object):
         if not obj.data.materials:
             return None
 
         mat = obj.data.materials[0]
-        if not mat.node_tree:
+        if not mat or not mat.node_tree:
             return None
 
         for node in mat.node_tree.nodes:
             if node.type == "TEX_IMAGE" and node.image:
-                return node.image.size
+                w, h = node.image.size
+                if w and h:
+                    return w, h
+        return None
 
-    def execute(self, context: Context):
-        obj = context.object
-        if obj and obj.type == "MESH":
-            prev_mode = obj.mode
-            bpy.ops.object.mode_set(mode="OBJECT")
-            self.sync_uv_to_vertex(obj, context.scene.bonedot_scale)
-            bpy.ops.object.mode_set(mode=prev_mode)
-            self.report({"INFO"}, "UV synced to mesh vertices")
+    def sync_objects(self, context: Context):
+        objects = [
+            obj
+            for obj in context.selected_objects
+            if obj.type == "MESH" and obj.data.uv_layers.active
+        ]
+        if context.object and context.object.type == "MESH":
+            if context.object not in objects and context.object.data.uv_layers.active:
+                objects.append(context.object)
+        return objects
+
+    def sync_uv_to_vertex(self, obj: Object, size, scale=0.01, previous=None):
+        """Write the positions of vertices whose UVs changed since ``previous``.
+
+        Returns the loop UVs that were read, to diff against on the next call.
+        """
+        import numpy as np
+
+        from bone_dot.core.atlas import atlas_placement, unmap_uvs
+        from bone_dot.core.mesh import changed_vertex_uvs, sprite_origin, uv_to_local
+
+        mesh = obj.data
+        if obj.mode == "EDIT":
+            # UV edits live in the edit bmesh until they are flushed
+            obj.update_from_editmode()
+        loop_uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+        mesh.uv_layers.active.data.foreach_get("uv", loop_uvs)
+        loop_uvs = loop_uvs.reshape(-1, 2)
+        loop_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", loop_vertices)
+
+        verts, uvs = changed_vertex_uvs(loop_vertices, loop_uvs, previous)
+        profiler.count("uv loops read", len(loop_vertices))
+        if not len(verts):
+            return loop_uvs
+        profiler.count("vertices moved", len(verts))
+        packed = atlas_placement(obj)
+        if packed is not None:
+            # ``size`` is the atlas page, vertices are laid out on the source image
+            source_size, region, placement = packed
+            uvs = unmap_uvs(uvs, source_size, region, placement, size)
+            size = source_size
+        offset = sprite_origin(obj, size)
+        positions = uv_to_local(uvs, size, scale, offset)
+
+        if obj.mode == "EDIT":
+            bm = bmesh.from_edit_mesh(mesh)
+            bm.verts.ensure_lookup_table()
+            for i, (x, y) in zip(verts.tolist(), positions.tolist()):
+                co = bm.verts[i].co
+                co.x = x
+                co.y = y
+            bmesh.update_edit_mesh(mesh, loop_triangles=False, destructive=False)
         else:
+            co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+            mesh.vertices.foreach_get("co", co)
+            co = co.reshape(-1, 3)
+            co[verts, :2] = positions
+            mesh.vertices.foreach_set("co", co.reshape(-1))
+            mesh.update()
+        return loop_uvs
+
+    def tick(self, context: Context):
+        with profiler.span("uv sync"):
+            self.sync_selected(context)
+
+    def sync_selected(self, context: Context):
+        scale = context.scene.bonedot_scale
+        objects = self.sync_objects(context)
+        names = {obj.name for obj in objects}
+        # forget deselected objects so reselecting them starts from scratch
+        self.snapshots = {
+            name: uvs for name, uvs in self.snapshots.items() if name in names
+        }
+        for obj in objects:
+            size = self.get_tex_image_size(obj)
+            if size is None:
+                continue
+            self.snapshots[obj.name] = self.sync_uv_to_vertex(
+                obj, size, scale, self.snapshots.get(obj.name)
+            )
+
+    def invoke(self, context: Context, event: Event):
+        cls = type(self)
+        if cls.running:
+            cls.running = False
+            self.report({"INFO"}, "UV sync stopped")
+            return {"FINISHED"}
+        objects = self.sync_objects(context)
+        if not objects:
+            self.report({"WARNING"}, "Select a mesh object")
+            return {"CANCELLED"}
+        missing = [obj.name for obj in objects if not self.get_tex_image_size(obj)]
+        if missing:
+            self.report(
+                {"WARNING"}, f"No texture image, not synced: {', '.join(missing)}"
+            )
+
+        self.snapshots = {}
+        self.tick(context)
+        wm = context.window_manager
+        self.timer = wm.event_timer_add(self.interval, window=context.window)
+        wm.modal_handler_add(self)
+        cls.running = True
+        self.report({"INFO"}, "UV sync started")
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context: Context, event: Event):
+        if not type(self).running:
+            self.finish(context)
+            return {"CANCELLED"}
+        if event.type == "TIMER":
+            self.tick(context)
+        return {"PASS_THROUGH"}
+
+    def cancel(self, context: Context):
+        self.finish(context)
+
+    def finish(self, context: Context):
+        context.window_manager.event_timer_remove(self.timer)
+        type(self).running = False
+        for area in context.screen.areas if context.screen else []:
+            area.tag_redraw()
+
+    def execute(self, context: Context):
+        synced = 0
+        for obj in self.sync_objects(context):
+            size = self.get_tex_image_size(obj)
+            if size is None:
+                self.report({"WARNING"}, f"{obj.name} has no texture image")
+                continue
+            self.sync_uv_to_vertex(obj, size, context.scene.bonedot_scale)
+            synced += 1
+        if not synced:
             self.report({"WARNING"}, "Select a mesh object")
+            return {"CANCELLED"}
+        self.report({"INFO"}, "UV synced to mesh vertices")
         return {"FINISHED"}
@@ -0,0 +1,49 @@
+import bpy
+from bpy.types import Context
+
+from bone_dot.core.profile import profiler
+
+# rows of the summary drawn, the written trace has all of them
+MAX_ROWS = 24
+
+
+class Bonedot_PT_Profile(bpy.types.Panel):
+    bl_label = "Profiling"
+    bl_idname = "BONEDOT_PT_profile_panel"
+    bl_options = {"DEFAULT_CLOSED"}
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "BoneDot"
+
+    def draw(self, context: Context):
+        layout = self.layout
+        row = layout.row()
+        if profiler.enabled:
+            row.operator(
+                "bonedot.toggle_profiling", text="Stop Profiling", icon="PAUSE"
+            )
+        else:
+            row.operator(
+                "bonedot.toggle_profiling", text="Start Profiling", icon="PLAY"
+            )
+        row.operator("bonedot.clear_profile", text="", icon="TRASH")
+        row.operator("bonedot.write_trace", text="", icon="EXPORT")
+
+        rows = profiler.summary()
+        if not rows and not profiler.counters:
+            layout.label(text="Nothing recorded")
+            return
+        col = layout.column(align=True)
+        for depth, name, seconds, calls in rows[:MAX_ROWS]:
+            split = col.split(factor=0.6)
+            split.label(text="    " * depth + name)
+            split.label(text=f"{seconds * 1000:.1f} ms  x{calls}")
+        if len(rows) > MAX_ROWS:
+            col.label(text=f"{len(rows) - MAX_ROWS} more in the trace")
+
+        if profiler.counters:
+            col = layout.column(align=True)
+            for name, value in profiler.counters.items():
+                split = col.split(factor=0.6)
+                split.label(text=name)
+                split.label(text=f"{value:,}")
@@ -1,6 +1,8 @@
 import bpy
 from bpy.types import Context
 
+from bone_dot.dependencies import FAILED, installer, ready
+
 
 class Bonedot_PT_ImportSprite(bpy.types.Panel):
     bl_label = "Sprite and Mesh"
@@ -12,14 +14,24 @@ class Bonedot_PT_ImportSprite(bpy.types.Panel):
 
     def draw(self, context: Context):
         layout = self.layout
+        if not ready():
+            icon = "ERROR" if installer.state == FAILED else "TIME"
+            layout.label(text=installer.message(), icon=icon)
         row1 = layout.row()
         row1.prop(context.scene, "bonedot_scale")
         row1.operator(
             "bonedot.import_sprites", text="Import Sprite", icon="FILE_FOLDER"
         )
+        row1.operator("bonedot.import_sprite_sheet", text="", icon="IMGDISPLAY")
         row2 = layout.row()
         row2.operator("bonedot.cutoff_mesh", text="Cutoff Mesh", icon="MESH_PLANE")
+        row2.operator("bonedot.clear_contour_cache", text="", icon="TRASH")
         row3 = layout.row()
         row3.operator(
             "bonedot.tris_to_quads", text="Tris to Quads", icon="MOD_TRIANGULATE"
         )
+        row3.operator("bonedot.build_atlas", text="Build Atlas", icon="TEXTURE")
+        row4 = layout.row()
+        row4.operator(
+            "bonedot.export_animation", text="Export Animation", icon="EXPORT"
+        )
@@ -1,6 +1,9 @@
 import bpy
 from bpy.types import Context
 
+from bone_dot.dependencies import FAILED, installer, ready
+from bone_dot.operator.uv_operator import Bonedot_OT_ModalUVSyncOperator
+
 
 class Bonedot_PT_UVTools(bpy.types.Panel):
     bl_label = "Bonedot UV Tools"
@@ -12,5 +15,11 @@ class Bonedot_PT_UVTools(bpy.types.Panel):
 
     def draw(self, context: Context):
         layout = self.layout
+        if not ready():
+            icon = "ERROR" if installer.state == FAILED else "TIME"
+            layout.label(text=installer.message(), icon=icon)
         row = layout.row()
-        row.operator("bonedot.modal_uv_sync", text="UV Sync Vertices")
+        if Bonedot_OT_ModalUVSyncOperator.running:
+            row.operator("bonedot.modal_uv_sync", text="Stop UV Sync", icon="PAUSE")
+        else:
+            row.operator("bonedot.modal_uv_sync", text="UV Sync Vertices")
@@ -0,0 +1,165 @@
+"""Round trips through the .bdsket writer and reader, no Blender needed.
+
+Run from the repository root with ``python -m pytest tests`` or
+``python -m unittest discover tests``.
+"""
+
+import os
+import struct
+import tempfile
+import unittest
+
+import numpy as np
+
+from bone_dot.core.bdsket import (
+    CODECS,
+    HEADER,
+    KIND_MESH,
+    KIND_SKELETON,
+    VERSION,
+    BdsketError,
+    BdsketReader,
+    BdsketWriter,
+    read_animation,
+    write_animation,
+    write_mesh,
+    write_skeleton,
+)
+
+BONES = [
+    {"name": "root", "parent": None, "head": [0, 0], "tail": [0, 1], "angle": 1.5},
+    {"name": "arm", "parent": "root", "head": [0, 1], "tail": [1, 1], "angle": 0.0},
+]
+
+
+def make_mesh(vertex_count: int) -> dict:
+    rng = np.random.default_rng(vertex_count)
+    return {
+        "name": "body",
+        "texture": "body.png",
+        "z_hint": 0.25,
+        "vertices": rng.random((vertex_count, 2)),
+        "uvs": rng.random((vertex_count, 2)),
+        "triangles": rng.integers(0, vertex_count, (vertex_count // 2, 3)),
+        "bone_indices": rng.integers(0, 2, (vertex_count, 4)).astype(np.uint8),
+        "bone_weights": rng.random((vertex_count, 4)).astype(np.float32),
+        "trim": {"rect": [1, 2, 30, 40], "source_size": [32, 48]},
+    }
+
+
+ANIMATION = {
+    "name": "walk",
+    "data": {
+        "fps": 24,
+        "interpolation": "cubic",
+        "tracks": [
+            {
+                "bone": "root",
+                "location": [[0, 0.0, 0.0], [12, 0.5, -0.25]],
+                "rotation": [[0, 1.5]],
+            },
+            # a bone that never moves keeps no keys at all
+            {"bone": "arm", "location": [], "rotation": []},
+        ],
+    },
+}
+
+
+class BdsketRoundTrip(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "out.bdsket")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, codec, meshes):
+        with open(self.path, "wb") as f, BdsketWriter(f, codec) as writer:
+            write_skeleton(writer, "hero", BONES)
+            for name, mesh in meshes.items():
+                write_mesh(writer, name, mesh)
+            write_animation(writer, "hero/walk", ANIMATION)
+
+    def test_codecs(self):
+        for codec_name, codec in CODECS.items():
+            with self.subTest(codec=codec_name):
+                self.round_trip(codec)
+
+    def round_trip(self, codec):
+        meshes = {"hero/small": make_mesh(64), "hero/large": make_mesh(70000)}
+        self.write(codec, meshes)
+        with BdsketReader(self.path) as reader:
+            self.assertEqual(reader.names(KIND_MESH), list(meshes))
+
+            meta, arrays = reader.read(KIND_SKELETON, "hero")
+            self.assertEqual(meta["bones"], ["root", "arm"])
+            np.testing.assert_array_equal(arrays["parents"], [-1, 0])
+            self.assertEqual(arrays["parents"].dtype, np.int32)
+            self.assertEqual(arrays["head"].dtype, np.float32)
+            np.testing.assert_array_equal(arrays["tail"], [[0, 1], [1, 1]])
+
+            for name, triangle_dtype in (
+                ("hero/small", np.uint16),
+                ("hero/large", np.uint32),
+            ):
+                mesh = meshes[name]
+                meta, arrays = reader.read(KIND_MESH, name)
+                self.assertEqual(meta["name"], "body")
+                self.assertEqual(meta["influences"], 4)
+                self.assertEqual(meta["trim"], mesh["trim"])
+                self.assertEqual(arrays["triangles"].dtype, triangle_dtype)
+                np.testing.assert_array_equal(arrays["triangles"], mesh["triangles"])
+                for key in ("vertices", "uvs", "bone_weights"):
+                    self.assertEqual(arrays[key].dtype, np.float32)
+                    self.assertEqual(arrays[key].shape, np.shape(mesh[key]))
+                    np.testing.assert_array_equal(
+                        arrays[key], np.asarray(mesh[key], dtype=np.float32)
+                    )
+                np.testing.assert_array_equal(
+                    arrays["bone_indices"], mesh["bone_indices"]
+                )
+
+            animation = read_animation(reader, "hero/walk")
+            self.assertEqual(animation["name"], "walk")
+            self.assertEqual(animation["data"]["fps"], 24)
+            self.assertEqual(animation["data"]["interpolation"], "cubic")
+            root, arm = animation["data"]["tracks"]
+            self.assertEqual(root["bone"], "root")
+            self.assertEqual(root["location"].dtype, np.float32)
+            np.testing.assert_array_equal(
+                root["location"], [[0, 0.0, 0.0], [12, 0.5, -0.25]]
+            )
+            np.testing.assert_array_equal(root["rotation"], [[0, 1.5]])
+            self.assertEqual(arm["location"].shape, (0, 3))
+            self.assertEqual(arm["rotation"].shape, (0, 2))
+
+    def test_no_sections(self):
+        with open(self.path, "wb") as f, BdsketWriter(f):
+            pass
+        with BdsketReader(self.path) as reader:
+            self.assertEqual(reader.sections, [])
+            with self.assertRaises(KeyError):
+                reader.read(KIND_MESH, "missing")
+
+    def test_bad_magic(self):
+        with open(self.path, "wb") as f:
+            f.write(b"PNG\0" + bytes(HEADER.size))
+        with self.assertRaisesRegex(BdsketError, "not a bdsket file"):
+            BdsketReader(self.path)
+
+    def test_newer_version(self):
+        self.write(CODECS["NONE"], {})
+        with open(self.path, "r+b") as f:
+            f.seek(4)
+            f.write(struct.pack("<H", VERSION + 1))
+        with self.assertRaisesRegex(BdsketError, "version"):
+            BdsketReader(self.path)
+
+    def test_empty_file(self):
+        open(self.path, "wb").close()
+        with self.assertRaisesRegex(BdsketError, "empty"):
+            BdsketReader(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Alpha contour tracing on synthetic masks, no Blender needed."""
+
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from bone_dot.core.contour import (
+    alpha_mask,
+    signed_area,
+    trace_alpha_contours,
+    trace_contours,
+)
+
+
+def square(size=12, box=(2, 2, 10, 10)) -> np.ndarray:
+    mask = np.zeros((size, size), dtype=bool)
+    x0, y0, x1, y1 = box
+    mask[y0:y1, x0:x1] = True
+    return mask
+
+
+def traced_area(contours) -> float:
+    # holes wind the other way, so their area subtracts
+    return sum(signed_area(contour.points) for contour in contours)
+
+
+class TraceContours(unittest.TestCase):
+    def check(self, mask, outer, holes):
+        for corners_only in (False, True):
+            with self.subTest(corners_only=corners_only):
+                contours = trace_contours(mask, corners_only)
+                self.assertEqual([c.is_hole for c in contours].count(False), outer)
+                self.assertEqual([c.is_hole for c in contours].count(True), holes)
+                self.assertEqual(traced_area(contours), np.count_nonzero(mask))
+                for contour in contours:
+                    self.assertEqual(contour.points.shape[1], 2)
+                    self.assertEqual(signed_area(contour.points) < 0, contour.is_hole)
+
+    def test_filled_square(self):
+        mask = square()
+        self.check(mask, outer=1, holes=0)
+        (contour,) = trace_contours(mask, corners_only=True)
+        self.assertEqual(
+            sorted(map(tuple, contour.points.tolist())),
+            [(2, 2), (2, 10), (10, 2), (10, 10)],
+        )
+        (contour,) = trace_contours(mask)
+        # every pixel edge along the border is one point
+        self.assertEqual(len(contour.points), 32)
+
+    def test_square_with_hole(self):
+        mask = square()
+        mask[4:7, 5:8] = False
+        self.check(mask, outer=1, holes=1)
+
+    def test_disjoint_blobs(self):
+        mask = square(16, (1, 1, 5, 4))
+        mask[8:15, 9:12] = True
+        self.check(mask, outer=2, holes=0)
+
+    def test_single_pixels_and_borders(self):
+        # blobs touching the image border and a lone pixel
+        mask = np.zeros((6, 7), dtype=bool)
+        mask[0, :] = True
+        mask[3, 3] = True
+        mask[2:, 6] = True
+        self.check(mask, outer=3, holes=0)
+
+    def test_diagonal_contact(self):
+        # pixels touching at a corner only are one 8-connected island
+        mask = np.zeros((4, 4), dtype=bool)
+        mask[1, 1] = mask[2, 2] = True
+        self.check(mask, outer=1, holes=0)
+
+    def test_empty_and_opaque(self):
+        self.assertEqual(trace_contours(np.zeros((8, 8), dtype=bool)), [])
+        mask = np.ones((5, 9), dtype=bool)
+        self.check(mask, outer=1, holes=0)
+        (contour,) = trace_contours(mask, corners_only=True)
+        self.assertEqual(signed_area(contour.points), 45)
+
+    def test_alpha_threshold(self):
+        alpha = np.zeros((8, 8), dtype=np.uint8)
+        alpha[1:7, 1:7] = 40
+        alpha[3:5, 3:5] = 200
+        image = Image.fromarray(np.dstack([alpha] * 4), "RGBA")
+        self.assertEqual(np.count_nonzero(alpha_mask(image, 1)), 36)
+        self.assertEqual(np.count_nonzero(alpha_mask(image, 128)), 4)
+        contours = trace_alpha_contours(image, 128, corners_only=True)
+        self.assertEqual(traced_area(contours), 4)
+
+    def test_random_masks(self):
+        rng = np.random.default_rng(7)
+        for _ in range(50):
+            mask = rng.random((24, 20)) < 0.45
+            self.assertEqual(
+                traced_area(trace_contours(mask, True)), np.count_nonzero(mask)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""Section reuse of the incremental .bdsket export, no Blender needed."""
+
+import os
+import tempfile
+import unittest
+
+from bone_dot.core.bdsket import (
+    CODEC_RAW,
+    KIND_ANIMATION,
+    KIND_MESH,
+    BdsketReader,
+)
+from bone_dot.core.incremental import IncrementalExport
+
+
+class IncrementalReuse(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "out.bdsket")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def export(self, sections):
+        """Write ``{(kind, name): digest}``, returning the reused names."""
+        with IncrementalExport(self.path, CODEC_RAW) as export:
+            for (kind, name), digest in sections.items():
+                if not export.reuse(kind, name, digest):
+                    export.writer.add_section(kind, name, {"digest": digest})
+                    export.record(kind, name, digest)
+        return export.reused
+
+    def test_same_name_in_two_kinds(self):
+        sections = {
+            (KIND_MESH, "hero/walk"): "mesh",
+            (KIND_ANIMATION, "hero/walk"): "animation",
+        }
+        self.assertEqual(self.export(sections), [])
+        self.assertEqual(self.export(sections), ["hero/walk", "hero/walk"])
+        with BdsketReader(self.path) as reader:
+            meta, _ = reader.read(KIND_ANIMATION, "hero/walk")
+            self.assertEqual(meta["digest"], "animation")
+
+    def test_changed_section_is_rebuilt(self):
+        self.export({(KIND_MESH, "hero/body"): "a", (KIND_MESH, "hero/arm"): "b"})
+        reused = self.export(
+            {(KIND_MESH, "hero/body"): "a", (KIND_MESH, "hero/arm"): "c"}
+        )
+        self.assertEqual(reused, ["hero/body"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""Ear clipping of traced alpha contours, no Blender needed."""
+
+import unittest
+
+import numpy as np
+
+from bone_dot.core.contour import signed_area, trace_contours
+from bone_dot.core.triangulate import cross, triangulate_contours
+
+
+def parse(rows: str) -> np.ndarray:
+    return np.array([[c == "#" for c in row] for row in rows.split()])
+
+
+# a hole touching the outline diagonally, with a second hole bridged to the
+# same corner
+SHARED_BRIDGE = """
+........
+...#....
+..#.###.
+.#...##.
+..###...
+..#.#...
+.#..#...
+.#..#...
+..#.#...
+...#....
+........
+"""
+
+# pixel corners lying exactly on the cut between two nudged copies
+COLLINEAR_CORNER = """
+......
+..#...
+#.#...
+.#....
+.##...
+..#...
+..#...
+...#..
+"""
+
+
+class Triangulate(unittest.TestCase):
+    def check(self, mask):
+        for corners_only in (False, True):
+            with self.subTest(corners_only=corners_only):
+                contours = [c.points for c in trace_contours(mask, corners_only)]
+                points, triangles = triangulate_contours(contours)
+                corners = points[triangles]
+                area = cross(corners[:, 0], corners[:, 1], corners[:, 2]) / 2
+                self.assertTrue(np.all(area > 0))
+                # any overlap or gap shows up as a difference in area
+                self.assertEqual(area.sum(), sum(map(signed_area, contours)))
+
+    def test_square_with_hole(self):
+        mask = np.ones((10, 10), dtype=bool)
+        mask[3:6, 4:7] = False
+        self.check(mask)
+
+    def test_shared_bridge(self):
+        self.check(parse(SHARED_BRIDGE))
+
+    def test_collinear_corner(self):
+        self.check(parse(COLLINEAR_CORNER))
+
+    def test_random_masks(self):
+        rng = np.random.default_rng(3)
+        for _ in range(30):
+            self.check(rng.random((24, 20)) < rng.uniform(0.3, 0.7))
+
+
+if __name__ == "__main__":
+    unittest.main()